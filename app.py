@@ -1,7 +1,8 @@
 import os
 from flask import Flask, render_template
 from config import config
-from extensions import db, migrate
+from extensions import db, migrate, page_cache, assets, compress, sqlite_profile, \
+    readonly_routing, render_writer, metrics, sql_profiler
 
 
 def create_app(config_name=None):
@@ -14,7 +15,17 @@ def create_app(config_name=None):
 
     # 初始化扩展
     db.init_app(app)
+    # 指标的请求钩子需最先注册，耗时才能覆盖其他扩展的处理
+    metrics.init_app(app, db)
+    sqlite_profile.init_app(app, db)
+    readonly_routing.init_app(app)
     migrate.init_app(app, db)
+    page_cache.init_app(app)
+    assets.init_app(app)
+    compress.init_app(app)
+    # 在压缩之后注册，after_request 逆序执行，SQL 汇总表先插入页面再压缩
+    sql_profiler.init_app(app, db)
+    render_writer.init_app(app)
 
     # 注册蓝图
     from routes import main_bp, blog_bp, auth_bp, api_bp
@@ -32,6 +43,13 @@ def create_app(config_name=None):
     app.add_url_rule('/management/posts/<int:post_id>/edit',
                      view_func=edit_post, methods=['POST'])
 
+    # 注册命令行命令
+    from commands import posts_cli, search_cli, site_cli, assets_cli
+    app.cli.add_command(posts_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(site_cli)
+    app.cli.add_command(assets_cli)
+
     # 注册错误处理器
     @app.errorhandler(404)
     def page_not_found(e):
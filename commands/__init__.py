@@ -0,0 +1,6 @@
+from .posts import posts_cli
+from .search import search_cli
+from .site import site_cli
+from .assets import assets_cli
+
+__all__ = ['posts_cli', 'search_cli', 'site_cli', 'assets_cli']
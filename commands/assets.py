@@ -0,0 +1,21 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from extensions import assets
+from utils.assets import build_assets, brotli
+
+assets_cli = AppGroup('assets', help='静态资源构建命令')
+
+
+@assets_cli.command('build')
+@click.option('--level', type=click.IntRange(1, 9), default=9, show_default=True, help='gzip 压缩级别')
+def build(level):
+    """压缩 static/css 与 static/js，生成带内容哈希的文件及 .gz/.br 预压缩版本"""
+    manifest = build_assets(current_app.static_folder, current_app.static_url_path, level=level)
+    assets.load_manifest(current_app)
+    for src, out in sorted(manifest.items()):
+        click.echo(f'{src} -> {out}')
+    if brotli is None:
+        click.echo('[提示] 未安装 Brotli，已跳过 .br 文件')
+    click.echo(f'完成：{len(manifest)} 个文件，清单已写入 static/dist/manifest.json')
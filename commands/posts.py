@@ -0,0 +1,72 @@
+import time
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select, update
+
+from extensions import db
+from models import Post, SiteState
+from utils.markdown_helper import content_hash, RENDERER_VERSION
+from utils.render_pool import RenderPool
+
+posts_cli = AppGroup('posts', help='文章相关的维护命令')
+
+
+def _find_stale_ids(force: bool) -> tuple[list[int], int]:
+    """流式扫描文章表，返回缓存缺失或过期的文章 ID 列表与文章总数"""
+    stmt = select(
+        Post.id, Post.title, Post.content,
+        Post.content_hash, Post.render_version, Post.rendered_html.is_(None)
+    ).order_by(Post.id).execution_options(yield_per=500)
+
+    stale, total = [], 0
+    for post_id, title, content, c_hash, version, missing in db.session.execute(stmt):
+        total += 1
+        # 判定规则与 Post.is_render_stale 保持一致
+        if force or missing or version != RENDERER_VERSION or c_hash != content_hash(title, content):
+            stale.append(post_id)
+    return stale, total
+
+
+def _batches(seq: list, size: int):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+@posts_cli.command('render')
+@click.option('--force', is_flag=True, help='忽略缓存状态，重新渲染全部文章')
+@click.option('--dry-run', is_flag=True, help='只统计需要重新渲染的文章数量，不写入数据库')
+@click.option('--workers', type=int, default=None, help='渲染进程数（默认使用全部 CPU 核心）')
+@click.option('--batch-size', type=int, default=100, show_default=True, help='每个事务写回的文章数')
+def render_posts(force, dry_run, workers, batch_size):
+    """批量（重新）渲染文章的 Markdown 缓存"""
+    start = time.perf_counter()
+    stale_ids, total = _find_stale_ids(force)
+    click.echo(f'共 {total} 篇文章，其中 {len(stale_ids)} 篇需要渲染'
+               f'（渲染器版本 {RENDERER_VERSION}）')
+    if dry_run or not stale_ids:
+        return
+
+    batch_size = max(1, batch_size)
+    done = 0
+    with RenderPool(workers) as pool:
+        try:
+            for ids in _batches(stale_ids, batch_size):
+                rows = db.session.execute(
+                    select(Post.id, Post.title, Post.content).where(Post.id.in_(ids))
+                ).all()
+                results = [{'id': post_id, **fields}
+                           for post_id, fields in pool.render([tuple(r) for r in rows])]
+
+                # 按主键批量更新，每批一个事务（批量 UPDATE 不经过 flush，需手动递增内容版本号）
+                if results:
+                    db.session.execute(update(Post), results)
+                    SiteState.bump_generation()
+                db.session.commit()
+                done += len(results)
+                click.echo(f'[{done}/{len(stale_ids)}] 已渲染')
+        except Exception:
+            db.session.rollback()
+            raise
+
+    click.echo(f'完成：渲染 {done} 篇，用时 {time.perf_counter() - start:.2f}s')
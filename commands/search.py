@@ -0,0 +1,26 @@
+import time
+
+import click
+from flask.cli import AppGroup
+
+from extensions import db
+from models import PostSearch
+
+search_cli = AppGroup('search', help='全文检索相关的维护命令')
+
+
+@search_cli.command('rebuild')
+def rebuild_index():
+    """重建文章全文索引"""
+    if not PostSearch.available():
+        click.echo('当前数据库不支持全文索引或索引表不存在，请先执行 flask db upgrade（仅支持 SQLite）')
+        raise SystemExit(1)
+
+    start = time.perf_counter()
+    try:
+        count = PostSearch.rebuild()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo(f'完成：索引 {count} 篇文章，用时 {time.perf_counter() - start:.2f}s')
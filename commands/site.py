@@ -0,0 +1,147 @@
+import json
+import os
+import time
+from xml.sax.saxutils import escape
+
+import click
+from flask import current_app, url_for
+from flask.cli import AppGroup
+from sqlalchemy import select
+
+from extensions import db
+from models import Post, SiteState
+from routes.blog import _encode_cursor
+from utils.conditional import make_etag
+
+site_cli = AppGroup('site', help='静态站点生成相关命令')
+
+# 输出目录中记录每个页面签名的清单文件（用于增量构建）
+MANIFEST_NAME = '.build-manifest.json'
+# 公开的静态页面（main 蓝图）
+MAIN_ENDPOINTS = ['main.index', 'main.about', 'main.interests', 'main.contact']
+
+
+def _output_path(out_dir: str, url: str) -> str:
+    """URL -> 输出文件路径
+
+    - /              -> index.html
+    - /blog          -> blog.html
+    - /blog?after=x  -> _q/blog/after=x.html（nginx 通过 $args 查找）
+    """
+    path, _, query = url.partition('?')
+    if query:
+        rel = os.path.join('_q', path.strip('/'), f'{query}.html')
+    elif path == '/':
+        rel = 'index.html'
+    else:
+        rel = path.strip('/') + '.html'
+    return os.path.join(out_dir, rel)
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _collect_pages() -> tuple[dict, list]:
+    """计算所有公开页面的 URL 与签名（只读取元数据列），以及 sitemap 条目
+
+    签名与对应视图的 ETag 一致：文章页取决于文章自身的修改时间与渲染缓存键，
+    列表页取决于全站内容版本号，其余页面只取决于模板。
+    """
+    pages, sitemap = {}, []
+    generation, last_modified = SiteState.get_content_state()
+
+    for endpoint in MAIN_ENDPOINTS:
+        url = url_for(endpoint)
+        pages[url] = make_etag(endpoint)
+        sitemap.append((url, None))
+
+    # 文章列表：按与 blog.index 相同的游标规则切分页面，前后翻页链接都需要生成
+    per_page = current_app.config['POSTS_PER_PAGE']
+    list_sig = make_etag('blog.index', generation, False)
+    rows = db.session.execute(
+        select(Post.id, Post.date_posted, Post.updated_at, Post.content_hash, Post.render_version)
+        .where(Post.status != 'hidden')
+        .order_by(Post.date_posted.desc(), Post.id.desc())
+    ).all()
+
+    pages[url_for('blog.index')] = list_sig
+    sitemap.append((url_for('blog.index'), last_modified))
+    for i in range(per_page, len(rows), per_page):
+        pages[url_for('blog.index', after=_encode_cursor(rows[i - 1]))] = list_sig
+        pages[url_for('blog.index', before=_encode_cursor(rows[i]))] = list_sig
+
+    for r in rows:
+        url = url_for('blog.post_detail', post_id=r.id)
+        pages[url] = make_etag('blog.post_detail', r.id, r.updated_at, r.content_hash, r.render_version)
+        sitemap.append((url, r.updated_at))
+
+    return pages, sitemap
+
+
+def _write_sitemap(out_dir: str, base_url: str, sitemap: list):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for url, lastmod in sitemap:
+        lines.append('  <url>')
+        lines.append(f'    <loc>{escape(base_url + url)}</loc>')
+        if lastmod is not None:
+            lines.append(f'    <lastmod>{lastmod.strftime("%Y-%m-%d")}</lastmod>')
+        lines.append('  </url>')
+    lines.append('</urlset>')
+    _write_atomic(os.path.join(out_dir, 'sitemap.xml'), ('\n'.join(lines) + '\n').encode('utf-8'))
+
+
+@site_cli.command('build')
+@click.option('--output', '-o', default='site', show_default=True, help='输出目录')
+@click.option('--base-url', default=None, help='sitemap 中使用的站点地址（默认读取 SITE_URL 配置）')
+@click.option('--force', is_flag=True, help='忽略清单，重新生成全部页面')
+def build_site(output, base_url, force):
+    """将所有公开页面渲染为静态 HTML（增量构建）"""
+    start = time.perf_counter()
+    out_dir = os.path.abspath(output)
+    base_url = (base_url or current_app.config['SITE_URL']).rstrip('/')
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+
+    old = {}
+    if not force and os.path.isfile(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+
+    with current_app.test_request_context():
+        pages, sitemap = _collect_pages()
+
+    # 以匿名访客身份请求各页面，输出与线上完全一致
+    client = current_app.test_client()
+    built = 0
+    for url, sig in pages.items():
+        path = _output_path(out_dir, url)
+        if old.get(url) == sig and os.path.isfile(path):
+            continue
+        resp = client.get(url)
+        if resp.status_code != 200:
+            raise click.ClickException(f'渲染 {url} 失败：HTTP {resp.status_code}')
+        _write_atomic(path, resp.get_data())
+        built += 1
+
+    # 删除已下线（删除或隐藏）文章及失效分页的页面
+    removed = 0
+    for url in set(old) - set(pages):
+        path = _output_path(out_dir, url)
+        if os.path.isfile(path):
+            os.remove(path)
+            removed += 1
+
+    # 404 页面供静态服务器的 error_page 使用
+    resp = client.get('/__static_build_404__')
+    _write_atomic(os.path.join(out_dir, '404.html'), resp.get_data())
+
+    _write_sitemap(out_dir, base_url, sitemap)
+    _write_atomic(manifest_path, json.dumps(pages, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    click.echo(f'完成：共 {len(pages)} 个页面，生成 {built} 个，删除 {removed} 个，'
+               f'用时 {time.perf_counter() - start:.2f}s -> {out_dir}')
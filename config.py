@@ -1,11 +1,48 @@
 import os
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 
 # 加载 .env 文件
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, '.env'))
 
 
+def _engine_options(uri: str) -> dict:
+    """按数据库类型生成连接池参数
+
+    - SQLite 文件库：每个 worker 进程的连接池大小与 gunicorn 线程数相当即可，连接复用时
+      PRAGMA 不必重复执行；超出池容量的请求排队等待而不是无限创建连接
+    - 其他数据库：取出连接前探活，并定期回收，避免使用被服务端断开的连接
+    """
+    pool_size = int(os.environ.get('DB_POOL_SIZE') or 5)
+    max_overflow = int(os.environ.get('DB_MAX_OVERFLOW') or 5)
+    pool_timeout = int(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    if uri.startswith('sqlite'):
+        if ':memory:' in uri or uri.rstrip('/') == 'sqlite:':
+            return {}
+        return {'pool_size': pool_size, 'max_overflow': max_overflow, 'pool_timeout': pool_timeout}
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),
+    }
+
+
+def _readonly_uri(uri: str) -> str | None:
+    """由主库地址推导只读连接地址：SQLite 文件库以 mode=ro 打开同一文件，其他数据库返回 None（需通过 DATABASE_READ_URI 指定从库）"""
+    url = make_url(uri)
+    if not url.drivername.startswith('sqlite') or url.database in (None, '', ':memory:'):
+        return None
+    database = url.database
+    if url.query.get('uri') and database.startswith('file:'):
+        database = database[len('file:'):]
+    query = {k: v for k, v in url.query.items() if k not in ('mode', 'uri')}
+    url = url.set(database=f'file:{database}', query={**query, 'mode': 'ro', 'uri': 'true'})
+    return url.render_as_string(hide_password=False)
+
+
 class Config:
     """基础配置类"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-please-change'
@@ -14,12 +51,83 @@ class Config:
     # 数据库配置
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI') or \
         'sqlite:///' + os.path.join(basedir, 'data.db')
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # 只读连接：DB_READONLY_BLUEPRINTS 中蓝图（公开页面）的查询使用，不占用可写连接、不争用写锁
+    # SQLite 默认以 mode=ro 打开同一文件，其他数据库可通过 DATABASE_READ_URI 指向从库
+    DB_READONLY_ENABLED = os.environ.get('DB_READONLY_ENABLED', '1') != '0'
+    DATABASE_READ_URI = os.environ.get('DATABASE_READ_URI') or _readonly_uri(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = {'readonly': DATABASE_READ_URI} if DB_READONLY_ENABLED and DATABASE_READ_URI else {}
+    DB_READONLY_BLUEPRINTS = ['main', 'blog']
+
+    # SQLite 连接参数（每个新连接执行一次 PRAGMA，其他数据库忽略）
+    SQLITE_PRAGMAS_ENABLED = os.environ.get('SQLITE_PRAGMAS_ENABLED', '1') != '0'
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    # 等待写锁的最长时间（毫秒）
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000)
+    # 内存映射读取的最大字节数，0 表示关闭
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)
+    # 页缓存大小，负数表示 KiB（默认 64MB）
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE') or -64 * 1024)
+    SQLITE_TEMP_STORE = os.environ.get('SQLITE_TEMP_STORE') or 'MEMORY'
+
+    # 通过 static/dist/manifest.json 将静态资源解析为带内容哈希的文件（需先执行 flask assets build）
+    ASSETS_USE_MANIFEST = os.environ.get('ASSETS_USE_MANIFEST', '1') != '0'
+
+    # 站点对外地址（生成 sitemap 等绝对链接时使用）
+    SITE_URL = os.environ.get('SITE_URL') or 'http://127.0.0.1:5000'
+
+    # 博客列表每页文章数
+    POSTS_PER_PAGE = int(os.environ.get('POSTS_PER_PAGE') or 10)
+    # 搜索结果最多显示的文章数
+    SEARCH_RESULTS_LIMIT = int(os.environ.get('SEARCH_RESULTS_LIMIT') or 20)
+
+    # 公开页面响应缓存（仅对未登录访客生效，文章写入后通过数据库中的内容版本号失效）
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '1') != '0'
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES') or 512)
+    PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES') or 32 * 1024 * 1024)
+    # 检查内容版本号的最小间隔（秒），0 表示每次请求都检查
+    PAGE_CACHE_CHECK_INTERVAL = float(os.environ.get('PAGE_CACHE_CHECK_INTERVAL') or 0)
+
+    # HTML / JSON 响应压缩（按 Accept-Encoding 协商 br 或 gzip，br 需安装 Brotli）
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', '1') != '0'
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL') or 6)
+    COMPRESS_BR_QUALITY = int(os.environ.get('COMPRESS_BR_QUALITY') or 5)
+    # 小于该字节数的响应不压缩
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 500)
+
+    # 渲染缓存回填：访客请求直接使用新渲染结果，写回数据库由后台线程攒批完成（0 表示在请求内同步写回）
+    RENDER_WRITER_ENABLED = os.environ.get('RENDER_WRITER_ENABLED', '1') != '0'
+    RENDER_WRITER_DELAY = float(os.environ.get('RENDER_WRITER_DELAY') or 0.5)
+    RENDER_WRITER_BATCH_SIZE = int(os.environ.get('RENDER_WRITER_BATCH_SIZE') or 100)
+
+    # 运行指标（/metrics，Prometheus 文本格式）：登录后台后可访问，抓取端使用 METRICS_TOKEN 作为 Bearer token；
+    # 多 worker 部署时设置 METRICS_DIR，各进程定期把快照写入该目录，/metrics 汇总全部进程
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_DIR = os.environ.get('METRICS_DIR') or ''
+    METRICS_SYNC_INTERVAL = float(os.environ.get('METRICS_SYNC_INTERVAL') or 5)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or ''
+
+    # SQL 慢查询日志（毫秒，0 关闭）；请求剖析（Server-Timing、N+1 嫌疑日志）默认只在开发环境开启
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS') or 200)
+    SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER_ENABLED', '0') != '0'
+    # 同一请求中相同语句执行达到该次数时记为 N+1 嫌疑
+    SQL_PROFILER_REPEAT_THRESHOLD = int(os.environ.get('SQL_PROFILER_REPEAT_THRESHOLD') or 5)
+    # 在每个 HTML 页面末尾附加语句汇总表（未开启时可在请求中加 ?_sql=1 临时查看）
+    SQL_PROFILER_HTML = os.environ.get('SQL_PROFILER_HTML', '0') != '0'
 
 
 class DevelopmentConfig(Config):
     """开发环境配置"""
     DEBUG = True
     FLASK_ENV = 'development'
+    # 开发时默认关闭页面缓存，避免修改模板后看到旧页面
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '0') != '0'
+    # 开发时直接使用源文件，修改 CSS/JS 后无需重新构建
+    ASSETS_USE_MANIFEST = os.environ.get('ASSETS_USE_MANIFEST', '0') != '0'
+    # 开发时默认开启 SQL 请求剖析
+    SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER_ENABLED', '1') != '0'
 
 
 class ProductionConfig(Config):
@@ -49,6 +49,10 @@ echo ""
 echo "========================================="
 echo "[4/4] Starting Gunicorn server..."
 echo "========================================="
+# 多个 worker 的指标快照目录，每次启动清空
+export METRICS_DIR="${METRICS_DIR:-/tmp/yewfence-metrics}"
+rm -rf "$METRICS_DIR"
+mkdir -p "$METRICS_DIR"
 exec gunicorn \
     --bind 0.0.0.0:5000 \
     --workers 4 \
@@ -1,6 +1,23 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from utils.page_cache import PageCache
+from utils.assets import Assets
+from utils.compression import Compress
+from utils.sqlite_profile import SQLiteProfile
+from utils.db_routing import RoutingSession, ReadOnlyRouting
+from utils.render_writer import RenderWriter
+from utils.metrics import Metrics
+from utils.sql_profiler import SQLProfiler
 
 # 初始化扩展实例（不绑定 app）
-db = SQLAlchemy()
+# 会话按请求选择主库或只读引擎（见 utils/db_routing.py）
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
+page_cache = PageCache()
+assets = Assets()
+compress = Compress()
+sqlite_profile = SQLiteProfile()
+readonly_routing = ReadOnlyRouting()
+render_writer = RenderWriter()
+metrics = Metrics()
+sql_profiler = SQLProfiler()
@@ -0,0 +1,43 @@
+"""Add FTS5 full-text search index for posts
+
+Revision ID: e5a9c3d7b218
+Revises: c2e7f04b9a13
+Create Date: 2026-10-17 13:21:06.457302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9c3d7b218'
+down_revision = 'c2e7f04b9a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 仅 SQLite 可用；其他数据库上搜索会降级为 LIKE 查询
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE post_fts USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+    # 为已有文章建立索引（中日韩文字切分为 bigram 后写入）
+    from utils.search_helper import segment
+    rows = bind.execute(sa.text("SELECT id, title, content FROM post")).fetchall()
+    if rows:
+        bind.execute(
+            sa.text("INSERT INTO post_fts (rowid, title, body) VALUES (:id, :title, :body)"),
+            [{'id': r.id, 'title': segment(r.title), 'body': segment(r.content)} for r in rows]
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    op.execute("DROP TABLE IF EXISTS post_fts")
@@ -1,4 +1,6 @@
 from .admin import Admin
 from .post import Post
+from .site_state import SiteState
+from .post_search import PostSearch
 
-__all__ = ['Admin', 'Post']
+__all__ = ['Admin', 'Post', 'SiteState', 'PostSearch']
@@ -1,4 +1,6 @@
+import json
 from datetime import datetime
+from sqlalchemy.orm import load_only
 from extensions import db
 
 
@@ -12,20 +14,79 @@ class Post(db.Model):
     date_posted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     status = db.Column(db.String(30), nullable=False, default='draft', index=True)
     note = db.Column(db.Text, nullable=True)
+    # 最后修改时间（任意列更新时自动刷新），用于 Last-Modified / ETag
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Markdown 渲染缓存
     rendered_html = db.Column(db.Text, nullable=True)
+    # 缓存键：渲染输入（标题 + 正文）的摘要与渲染器版本，任一不匹配即视为过期
+    content_hash = db.Column(db.String(64), nullable=True)
+    render_version = db.Column(db.String(32), nullable=True)
+
+    # 正文解析结果（与渲染缓存同时生成）：标题大纲（JSON）、字数、字符数与预计阅读分钟数
+    toc_json = db.Column(db.Text, nullable=True)
+    word_count = db.Column(db.Integer, nullable=True)
+    char_count = db.Column(db.Integer, nullable=True)
+    reading_minutes = db.Column(db.Integer, nullable=True)
+
+    # render_content() 写入的全部列，批量渲染（渲染池、导入脚本）按此回写
+    RENDER_FIELDS = ('rendered_html', 'content_hash', 'render_version',
+                     'toc_json', 'word_count', 'char_count', 'reading_minutes')
+
+    @classmethod
+    def summary_query(cls):
+        """列表视图使用的查询：只加载元数据列，不读取正文与渲染缓存
+
+        列表页、管理页与 JSON 导出只展示标题、作者、日期、状态、摘要与备注，
+        跳过 content / rendered_html 后读取量只与元数据大小有关，与文章篇幅无关。
+        """
+        return cls.query.options(load_only(
+            cls.id, cls.title, cls.author_name, cls.date_posted,
+            cls.status, cls.brief_summary, cls.note,
+            cls.word_count, cls.reading_minutes
+        ))
 
     def __repr__(self):
         """返回字符串表示"""
         return f'<Post {self.title}>'
 
+    def compute_content_hash(self):
+        """计算当前渲染输入的摘要（标题会影响去重标题逻辑，因此一并纳入）"""
+        from utils.markdown_helper import content_hash
+        return content_hash(self.title, self.content)
+
+    @property
+    def content_revision(self):
+        """正文的修订号（正文摘要前 16 位），增量保存时用于检测冲突"""
+        from utils.markdown_helper import content_hash
+        return content_hash(self.content)[:16]
+
+    @property
+    def is_render_stale(self):
+        """渲染缓存是否缺失或过期"""
+        from utils.markdown_helper import RENDERER_VERSION
+        return (
+            self.rendered_html is None
+            or self.render_version != RENDERER_VERSION
+            or self.content_hash != self.compute_content_hash()
+        )
+
+    @property
+    def toc(self):
+        """标题大纲（嵌套列表，每项包含 level、id、name 与 children），未渲染时为空列表"""
+        return json.loads(self.toc_json) if self.toc_json else []
+
     def render_content(self):
-        """渲染并缓存 Markdown 内容"""
-        from utils.markdown_helper import render_md, strip_md_title_if_matches
+        """渲染并缓存 Markdown 内容，同时写入标题大纲与字数统计"""
+        from utils.markdown_helper import analyze_markdown, RENDERER_VERSION
 
-        # 去掉标题（如果与数据库标题重复）
-        content_without_title = strip_md_title_if_matches(self.content or '', self.title)
-        # 渲染为 HTML
-        self.rendered_html = render_md(content_without_title or '')
+        # 一次解析完成：去掉与数据库标题重复的标题、渲染、提取大纲与统计
+        doc = analyze_markdown(self.content or '', self.title)
+        self.rendered_html = doc['html']
+        self.toc_json = json.dumps(doc['toc'], ensure_ascii=False)
+        self.word_count = doc['word_count']
+        self.char_count = doc['char_count']
+        self.reading_minutes = doc['reading_minutes']
+        self.content_hash = self.compute_content_hash()
+        self.render_version = RENDERER_VERSION
         return self.rendered_html
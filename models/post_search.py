@@ -0,0 +1,122 @@
+from sqlalchemy import event, inspect, select, text
+from extensions import db
+from utils.search_helper import segment, build_match_query
+from .post import Post
+
+# FTS5 虚拟表：rowid 即 post.id，title/body 存放经过 bigram 切分的文本
+FTS_TABLE = 'post_fts'
+# 已确认存在全文索引表的数据库（按连接 URL 缓存，只缓存正结果，迁移后无需重启即可生效）
+_fts_ready = set()
+
+
+class PostSearch:
+    """基于 SQLite FTS5 的文章全文检索"""
+
+    @staticmethod
+    def available(connection=None) -> bool:
+        """当前数据库是否支持并已创建全文索引表（仅 SQLite）"""
+        connection = connection or db.session.connection()
+        if connection.dialect.name != 'sqlite':
+            return False
+        key = str(connection.engine.url)
+        if key in _fts_ready:
+            return True
+        found = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE}
+        ).first() is not None
+        if found:
+            _fts_ready.add(key)
+        return found
+
+    @staticmethod
+    def index_post(connection, post_id: int, title: str, content: str):
+        """写入或更新单篇文章的索引"""
+        PostSearch.remove_post(connection, post_id)
+        connection.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (:id, :title, :body)"),
+            {'id': post_id, 'title': segment(title), 'body': segment(content)}
+        )
+
+    @staticmethod
+    def remove_post(connection, post_id: int):
+        """删除单篇文章的索引"""
+        connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': post_id})
+
+    @staticmethod
+    def rebuild(batch_size: int = 500) -> int:
+        """清空并重建全部索引（在调用方的事务中执行），返回索引的文章数"""
+        connection = db.session.connection()
+        connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        stmt = select(Post.id, Post.title, Post.content).execution_options(yield_per=batch_size)
+        batch, count = [], 0
+        for post_id, title, content in db.session.execute(stmt):
+            batch.append({'id': post_id, 'title': segment(title), 'body': segment(content)})
+            if len(batch) >= batch_size:
+                connection.execute(
+                    text(f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (:id, :title, :body)"), batch
+                )
+                count += len(batch)
+                batch = []
+        if batch:
+            connection.execute(
+                text(f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (:id, :title, :body)"), batch
+            )
+            count += len(batch)
+        # 合并索引段，减少查询时需要扫描的 b-tree 数量
+        connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+        return count
+
+    @staticmethod
+    def search(q: str, include_hidden: bool = False, limit: int = 20) -> list[int]:
+        """按相关度（bm25，标题权重更高）返回匹配的文章 ID 列表"""
+        match = build_match_query(q)
+        if not match:
+            return []
+
+        status_filter = '' if include_hidden else "AND post.status != 'hidden'"
+        if PostSearch.available():
+            sql = f"""
+                SELECT post.id FROM {FTS_TABLE}
+                JOIN post ON post.id = {FTS_TABLE}.rowid
+                WHERE {FTS_TABLE} MATCH :match {status_filter}
+                ORDER BY bm25({FTS_TABLE}, 10.0, 1.0)
+                LIMIT :limit
+            """
+            return list(db.session.execute(text(sql), {'match': match, 'limit': limit}).scalars())
+
+        # 降级方案：非 SQLite 数据库或尚未建立索引时使用 LIKE 逐词过滤（全表扫描）
+        query = select(Post.id)
+        for term in q.split():
+            pattern = f"%{term}%"
+            query = query.where(Post.title.ilike(pattern) | Post.content.ilike(pattern))
+        if not include_hidden:
+            query = query.where(Post.status != 'hidden')
+        query = query.order_by(Post.date_posted.desc()).limit(limit)
+        return list(db.session.execute(query).scalars())
+
+
+# ---------------
+# 与文章写入保持同步
+# ---------------
+
+@event.listens_for(Post, 'after_insert')
+def _index_after_insert(mapper, connection, target):
+    if PostSearch.available(connection):
+        PostSearch.index_post(connection, target.id, target.title, target.content)
+
+
+@event.listens_for(Post, 'after_update')
+def _index_after_update(mapper, connection, target):
+    state = inspect(target)
+    # 只有标题或正文变化才需要更新索引（例如只刷新渲染缓存时跳过）
+    if not (state.attrs.title.history.has_changes() or state.attrs.content.history.has_changes()):
+        return
+    if PostSearch.available(connection):
+        PostSearch.index_post(connection, target.id, target.title, target.content)
+
+
+@event.listens_for(Post, 'after_delete')
+def _index_after_delete(mapper, connection, target):
+    if PostSearch.available(connection):
+        PostSearch.remove_post(connection, target.id)
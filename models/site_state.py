@@ -0,0 +1,63 @@
+from datetime import datetime
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from extensions import db
+
+
+class SiteState(db.Model):
+    """站点级键值状态，目前用于存放内容版本号（跨 worker 共享的缓存失效信号）"""
+    __tablename__ = 'site_state'
+
+    CONTENT_GENERATION = 'content_generation'
+
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        """返回字符串表示"""
+        return f'<SiteState {self.key}={self.value}>'
+
+    @classmethod
+    def get_generation(cls) -> int:
+        """读取当前内容版本号"""
+        value = db.session.execute(
+            select(cls.value).where(cls.key == cls.CONTENT_GENERATION)
+        ).scalar()
+        return value or 0
+
+    @classmethod
+    def get_content_state(cls) -> tuple[int, datetime | None]:
+        """读取当前内容版本号及其最后修改时间"""
+        row = db.session.execute(
+            select(cls.value, cls.updated_at).where(cls.key == cls.CONTENT_GENERATION)
+        ).first()
+        if row is None:
+            return 0, None
+        return row.value or 0, row.updated_at
+
+    @classmethod
+    def bump_generation(cls, session=None):
+        """内容版本号 +1（在调用方的事务中执行，随事务一起提交）"""
+        session = session or db.session
+        result = session.execute(
+            update(cls.__table__)
+            .where(cls.__table__.c.key == cls.CONTENT_GENERATION)
+            .values(value=cls.__table__.c.value + 1, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            session.execute(cls.__table__.insert().values(
+                key=cls.CONTENT_GENERATION, value=1, updated_at=datetime.utcnow()
+            ))
+
+
+@event.listens_for(Session, 'before_flush')
+def _bump_generation_on_post_write(session, flush_context, instances):
+    """任何文章的新增、修改或删除都会在同一事务内递增内容版本号"""
+    from .post import Post
+
+    changed = any(isinstance(o, Post) for o in session.new) \
+        or any(isinstance(o, Post) for o in session.deleted) \
+        or any(isinstance(o, Post) and session.is_modified(o) for o in session.dirty)
+    if changed:
+        SiteState.bump_generation(session)
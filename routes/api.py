@@ -1,12 +1,16 @@
-from flask import Blueprint, request, redirect, url_for, jsonify, make_response, json
-from datetime import datetime
+from flask import Blueprint, request, redirect, url_for, jsonify, json, abort, \
+    stream_with_context, current_app
+from datetime import datetime, timezone
 from urllib.parse import quote
-import io
 import zipfile
 
-from models import Post
+from sqlalchemy import select
+
+from models import Post, SiteState
 from extensions import db
-from utils import login_required, render_md, find_title_in_content, strip_md_title_if_matches
+from utils import login_required, analyze_markdown, find_title_in_content, \
+    make_etag, not_modified, add_validators
+from utils.md_blocks import render_blocks
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -22,6 +26,43 @@ def _parse_date_yyyy_mm_dd(s: str):
         return None
 
 
+def _parse_since(s: str):
+    """解析 since 参数：支持 YYYY-MM-DD 或 ISO 8601 时间（不带时区时按 UTC 解释，带偏移时换算为 UTC）"""
+    try:
+        if not s:
+            return None
+        dt = datetime.fromisoformat(s)
+        # 带时区偏移的时间先换算为 UTC，再与数据库中的 naive UTC 时间比较
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return dt
+    except ValueError:
+        return None
+
+
+class _ChunkBuffer:
+    """只追加的写缓冲：zipfile 检测到不可 seek 时改用数据描述符，逐条写出"""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self.size += len(b)
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        """取出并清空已写入的数据"""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
 def _safe_filename(title: str) -> str:
     """生成安全的文件名"""
     base = (title or 'post').strip()
@@ -36,35 +77,149 @@ def _safe_filename(title: str) -> str:
 
 
 # 导出相关路由
+# JSON 导出可选字段及其序列化方式
+_EXPORT_FIELDS = {
+    'id': lambda v: v,
+    'title': lambda v: v,
+    'author_name': lambda v: v,
+    'date_posted': lambda v: v.strftime('%Y-%m-%d') if v else None,
+    'brief_summary': lambda v: v or '',
+    'status': lambda v: v,
+    'note': lambda v: v or '',
+    'content': lambda v: v or '',
+    'updated_at': lambda v: v.isoformat() if v else None,
+}
+# 默认导出字段（与 seed.py 导入所需的元数据一致，不含正文）
+_DEFAULT_EXPORT_FIELDS = ['id', 'title', 'author_name', 'date_posted', 'brief_summary', 'status', 'note']
+
+
 @api_bp.route('/posts/export_json', methods=['GET'])
 @login_required
 def export_json():
-    """导出所有文章为 JSON 格式"""
-    rows = Post.query.order_by(Post.id.desc()).all()
-    payload = []
-    for p in rows:
-        payload.append({
-            'id': p.id,
-            'title': p.title,
-            'author_name': p.author_name,
-            'date_posted': p.date_posted.strftime('%Y-%m-%d') if p.date_posted else None,
-            'brief_summary': p.brief_summary or '',
-            'status': p.status,
-            'note': p.note or ''
-        })
-
-    # 直接用 UTF-8 文本返回，避免中文被转义为 \uXXXX
-    body = json.dumps(payload, ensure_ascii=False)
-    resp = make_response(body)
-    resp.headers['Content-Type'] = 'application/json; charset=utf-8'
-    resp.headers['Content-Disposition'] = 'attachment; filename=blog.json'
-    return resp
-
-
-@api_bp.route('/posts/<int:post_id>/md', methods=['GET', 'POST', 'PUT'])
+    """导出文章为 JSON 格式（流式输出）
+
+    查询参数:
+      fields: 逗号分隔的导出字段，默认为全部元数据字段（不含正文）
+      status: 逗号分隔的状态过滤，例如 published,hidden
+      since: 只导出该时间之后修改过的文章（YYYY-MM-DD 或 ISO 8601）
+      format: json（默认，JSON 数组）或 ndjson（每行一个 JSON 对象）
+    """
+    fields_s = request.args.get('fields') or ''
+    fields = [f.strip() for f in fields_s.split(',') if f.strip()] or _DEFAULT_EXPORT_FIELDS
+    unknown = [f for f in fields if f not in _EXPORT_FIELDS]
+    if unknown:
+        return jsonify({'ok': False, 'error': f"未知字段: {', '.join(unknown)}"}), 400
+
+    statuses = [st.strip().lower() for st in (request.args.get('status') or '').split(',') if st.strip()]
+
+    since_s = request.args.get('since') or ''
+    since = _parse_since(since_s)
+    if since_s and since is None:
+        return jsonify({'ok': False, 'error': 'since 参数格式无效'}), 400
+
+    fmt = (request.args.get('format') or 'json').lower()
+    if fmt not in ('json', 'ndjson'):
+        return jsonify({'ok': False, 'error': 'format 只能为 json 或 ndjson'}), 400
+
+    # 条件请求：内容版本号未变时直接返回 304
+    generation, last_modified = SiteState.get_content_state()
+    etag = make_etag('api.export_json', generation, ','.join(fields), ','.join(statuses), since_s, fmt)
+    resp = not_modified(etag, last_modified, private=True)
+    if resp is not None:
+        return resp
+
+    # 优化：只查询所选字段对应的列，并通过服务端游标分批读取
+    stmt = select(*[getattr(Post, f) for f in fields]).order_by(Post.id.desc())
+    if statuses:
+        stmt = stmt.where(Post.status.in_(statuses))
+    if since is not None:
+        stmt = stmt.where(Post.updated_at >= since)
+    batch_size = 200
+    stmt = stmt.execution_options(yield_per=batch_size)
+    serializers = [_EXPORT_FIELDS[f] for f in fields]
+
+    def generate():
+        # 直接用 UTF-8 文本返回，避免中文被转义为 \uXXXX
+        sep = '\n' if fmt == 'ndjson' else ', '
+        batch = []
+        first = True
+        if fmt == 'json':
+            yield '['
+        for row in db.session.execute(stmt):
+            item = {f: ser(v) for f, ser, v in zip(fields, serializers, row)}
+            batch.append(json.dumps(item, ensure_ascii=False))
+            if len(batch) >= batch_size:
+                yield ('' if first else sep) + sep.join(batch)
+                first = False
+                batch.clear()
+        if batch:
+            yield ('' if first else sep) + sep.join(batch)
+            first = False
+        if fmt == 'json':
+            yield ']'
+        elif not first:
+            yield '\n'
+
+    if fmt == 'ndjson':
+        mimetype, filename = 'application/x-ndjson; charset=utf-8', 'blog.ndjson'
+    else:
+        mimetype, filename = 'application/json; charset=utf-8', 'blog.json'
+    resp = current_app.response_class(stream_with_context(generate()), mimetype=mimetype)
+    resp.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return add_validators(resp, etag, last_modified, private=True)
+
+
+def _apply_text_patch(content: str, ops) -> str:
+    """依次应用文本补丁 [{"start": int, "end": int, "text": str}, ...]
+
+    偏移量以 UTF-16 码元计（与浏览器端 JavaScript 字符串下标一致），每个操作基于前一个操作的结果。
+    偏移越界、拆开代理对或格式不符时抛出 ValueError。
+    """
+    if not isinstance(ops, list):
+        raise ValueError('ops 需为数组')
+    buf = (content or '').encode('utf-16-le')
+    for op in ops:
+        if not isinstance(op, dict):
+            raise ValueError('补丁格式无效')
+        start, end, text = op.get('start'), op.get('end'), op.get('text', '')
+        if not isinstance(start, int) or not isinstance(end, int) or not isinstance(text, str):
+            raise ValueError('补丁格式无效')
+        if not 0 <= start <= end <= len(buf) // 2:
+            raise ValueError('补丁偏移越界')
+        # 单个补丁可能只替换代理对的一半（例如相邻的两个 emoji），以 surrogatepass 编码后在整体解码时校验
+        buf = buf[:start * 2] + text.encode('utf-16-le', 'surrogatepass') + buf[end * 2:]
+    try:
+        return buf.decode('utf-16-le')
+    except UnicodeDecodeError:
+        raise ValueError('补丁拆开了代理对')
+
+
+@api_bp.route('/posts/<int:post_id>/md', methods=['GET', 'POST', 'PUT', 'PATCH'])
 @login_required
 def post_markdown(post_id: int):
-    """下载或更新文章的 Markdown 内容"""
+    """下载或更新文章的 Markdown 内容
+
+    - GET：下载 Markdown，响应头 X-Content-Revision 为当前正文修订号
+    - POST / PUT：请求体为完整 Markdown，保存后立即重新渲染
+    - PATCH：增量保存（编辑器自动保存），请求体（JSON）为
+      {"base": 基于的修订号, "ops": [{"start", "end", "text"}, ...], "render": 是否立即渲染}；
+      修订号不一致返回 409。未要求立即渲染时只保存正文，渲染缓存随之过期，
+      在下次访问文章或显式保存时再重新渲染，频繁自动保存不会每次都重新渲染整篇文章
+    """
+    etag = last_modified = None
+    if request.method == 'GET':
+        # 条件请求：只读取校验所需的列，未变化时不读取正文
+        meta = db.session.execute(
+            select(Post.updated_at, Post.content_hash).where(Post.id == post_id)
+        ).first()
+        if meta is None:
+            abort(404)
+        etag = make_etag('api.post_markdown', post_id, meta.updated_at, meta.content_hash)
+        last_modified = meta.updated_at
+        resp = not_modified(etag, last_modified, private=True)
+        if resp is not None:
+            return resp
+
     post = Post.query.get_or_404(post_id)
 
     if request.method in ('POST', 'PUT'):
@@ -75,7 +230,28 @@ def post_markdown(post_id: int):
             # 优化：更新 Markdown 后重新渲染缓存
             post.render_content()
             db.session.commit()
-            return jsonify({'ok': True, 'id': post.id}), 200
+            return jsonify({'ok': True, 'id': post.id, 'revision': post.content_revision}), 200
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'ok': False, 'error': str(e)}), 500
+
+    if request.method == 'PATCH':
+        data = request.get_json(silent=True) or {}
+        revision = post.content_revision
+        if data.get('base') != revision:
+            # 正文已在其他地方被修改，由客户端决定重新加载或整篇覆盖
+            return jsonify({'ok': False, 'error': '文章内容已被修改', 'revision': revision}), 409
+        try:
+            content = _apply_text_patch(post.content, data.get('ops'))
+        except ValueError as e:
+            return jsonify({'ok': False, 'error': str(e)}), 400
+        try:
+            if content != post.content:
+                post.content = content
+            if data.get('render') and post.is_render_stale:
+                post.render_content()
+            db.session.commit()
+            return jsonify({'ok': True, 'id': post.id, 'revision': post.content_revision}), 200
         except Exception as e:
             db.session.rollback()
             return jsonify({'ok': False, 'error': str(e)}), 500
@@ -85,30 +261,54 @@ def post_markdown(post_id: int):
     filename_base = _safe_filename(post.title)
     filename_utf8 = quote(f"{filename_base}.md")
 
-    from flask import current_app
     resp = current_app.response_class(response=content, mimetype='text/markdown; charset=utf-8')
     resp.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{filename_utf8}"
-    return resp
+    resp.headers['X-Content-Revision'] = post.content_revision
+    return add_validators(resp, etag, last_modified, private=True)
 
 
 @api_bp.route('/posts/export_md_zip', methods=['GET'])
 @login_required
 def export_md_zip():
-    """导出所有文章为 ZIP 压缩包"""
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        all_posts = Post.query.order_by(Post.id.desc()).all()
-        for post in all_posts:
-            filename_base = _safe_filename(post.title)
-            filename = f"{filename_base}.md"
-            content = post.content or ''
-            zip_file.writestr(filename, content)
-
-    zip_buffer.seek(0)
-    resp = make_response(zip_buffer.read())
-    resp.headers['Content-Type'] = 'application/zip'
+    """导出所有文章为 ZIP 压缩包（流式输出）
+
+    查询参数:
+      since: 只导出该时间之后修改过的文章（YYYY-MM-DD 或 ISO 8601），用于增量备份
+    """
+    since_s = request.args.get('since') or ''
+    since = _parse_since(since_s)
+    if since_s and since is None:
+        return jsonify({'ok': False, 'error': 'since 参数格式无效'}), 400
+
+    # 条件请求：内容版本号未变时直接返回 304
+    generation, last_modified = SiteState.get_content_state()
+    etag = make_etag('api.export_md_zip', generation, since_s)
+    resp = not_modified(etag, last_modified, private=True)
+    if resp is not None:
+        return resp
+
+    stmt = select(Post.title, Post.content).order_by(Post.id.desc())
+    if since is not None:
+        stmt = stmt.where(Post.updated_at >= since)
+    # 优化：分批读取文章、逐条压缩并立即发送，内存占用与文章总量无关
+    stmt = stmt.execution_options(yield_per=50)
+    chunk_size = 64 * 1024
+
+    def generate():
+        buf = _ChunkBuffer()
+        with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for title, content in db.session.execute(stmt):
+                filename_base = _safe_filename(title)
+                filename = f"{filename_base}.md"
+                zip_file.writestr(filename, content or '')
+                if buf.size >= chunk_size:
+                    yield buf.drain()
+        # 关闭后写出中央目录
+        yield buf.drain()
+
+    resp = current_app.response_class(stream_with_context(generate()), mimetype='application/zip')
     resp.headers['Content-Disposition'] = "attachment; filename=all_posts_md.zip"
-    return resp
+    return add_validators(resp, etag, last_modified, private=True)
 
 
 # 文章预览路由
@@ -118,15 +318,36 @@ def post_preview(post_id: int):
     """预览文章"""
     from flask import render_template
     post = Post.query.get_or_404(post_id)
-    md = strip_md_title_if_matches(post.content or '', post.title)
-    post_html_from_md_body = render_md(md)
+    # 预览始终按当前正文重新解析，不使用（也不写入）渲染缓存
+    doc = analyze_markdown(post.content or '', post.title)
     site_title = "PostReview | " + post.title
     return render_template("single_post.html",
                           post=post,
-                          post_html_from_md_body=post_html_from_md_body,
+                          post_html_from_md_body=doc['html'],
+                          toc=doc['toc'],
+                          word_count=doc['word_count'],
+                          reading_minutes=doc['reading_minutes'],
                           title=site_title)
 
 
+# 编辑器增量预览
+@api_bp.route('/posts/preview/blocks', methods=['POST'])
+@login_required
+def preview_blocks():
+    """按块增量渲染草稿
+
+    请求体（JSON）：{"text": 草稿全文, "title": 标题（可选）, "known": [客户端已持有的块哈希]}
+    返回：{"ok": true, "blocks": [按顺序的块哈希], "html": {缺少的块哈希: HTML}, "rendered": 实际渲染块数}
+    """
+    data = request.get_json(silent=True) or {}
+    text = data.get('text')
+    known = data.get('known') or []
+    if not isinstance(text, str) or not isinstance(known, list):
+        return jsonify({'ok': False, 'error': '请求体需包含字符串 text 与数组 known'}), 400
+    result = render_blocks(text, str(data.get('title') or ''), {k for k in known if isinstance(k, str)})
+    return jsonify({'ok': True, **result})
+
+
 # CRUD 路由
 @api_bp.route('/posts/new', methods=['POST'])
 @login_required
@@ -197,15 +418,13 @@ def edit_post(post_id: int):
             post.status = st
 
         # 若表单包含 content 字段，则更新（允许空字符串覆盖）
-        content_changed = False
         if 'content' in form:
             new_content = form.get('content') or ''
             if post.content != new_content:
                 post.content = new_content
-                content_changed = True
 
-        # 优化：如果内容或标题变化，重新渲染 Markdown 缓存
-        if content_changed or title:
+        # 优化：仅当渲染输入（内容或标题）变化导致缓存过期时才重新渲染
+        if post.is_render_stale:
             post.render_content()
 
         db.session.commit()
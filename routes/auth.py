@@ -50,7 +50,8 @@ def logout():
 @login_required
 def management():
     """显示管理页"""
-    all_posts = Post.query.order_by(Post.id.desc()).all()
+    # 优化：只加载列表展示所需的元数据列
+    all_posts = Post.summary_query().order_by(Post.id.desc()).all()
     return render_template('management.html', posts=all_posts)
 
 
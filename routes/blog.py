@@ -1,45 +1,177 @@
-from flask import Blueprint, render_template, session
-from models import Post
-from utils import render_md, strip_md_title_if_matches
+from datetime import datetime
+from flask import Blueprint, render_template, session, request, current_app, make_response, abort
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import load_only
+from models import Post, SiteState, PostSearch
+from extensions import db, page_cache, render_writer
+from utils import render_md, strip_md_title_if_matches, make_etag, not_modified, add_validators
+from utils.search_helper import highlight, make_snippet
+from utils.metrics import post_render_cache
 
 blog_bp = Blueprint('blog', __name__)
 
 
+# 工具函数
+def _encode_cursor(post) -> str:
+    """将文章的 (date_posted, id) 编码为分页游标"""
+    return f"{post.date_posted.isoformat()}_{post.id}"
+
+
+def _decode_cursor(s: str):
+    """解析分页游标，格式非法时返回 None"""
+    try:
+        if not s:
+            return None
+        date_s, id_s = s.rsplit('_', 1)
+        return datetime.fromisoformat(date_s), int(id_s)
+    except Exception:
+        return None
+
+
+def _keyset_page(query, per_page: int, after=None, before=None):
+    """基于 (date_posted, id) 的游标分页，利用 ix_post_date_posted 索引直接定位
+
+    参数:
+      query: 已附加可见性过滤条件的查询
+      after: 游标，返回排在其后（更旧）的一页
+      before: 游标，返回排在其前（更新）的一页
+
+    返回:
+      (posts, next_cursor, prev_cursor) —— 没有下一页/上一页时对应游标为 None
+    """
+    key = tuple_(Post.date_posted, Post.id)
+    if before:
+        # 向前翻页：升序取 per_page + 1 条再反转，多取的一条用于判断是否还有上一页
+        rows = query.filter(key > before)\
+                    .order_by(Post.date_posted.asc(), Post.id.asc())\
+                    .limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        posts = rows[:per_page][::-1]
+        has_next = True
+    else:
+        if after:
+            query = query.filter(key < after)
+        rows = query.order_by(Post.date_posted.desc(), Post.id.desc())\
+                    .limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        posts = rows[:per_page]
+        has_prev = after is not None
+
+    next_cursor = _encode_cursor(posts[-1]) if posts and has_next else None
+    prev_cursor = _encode_cursor(posts[0]) if posts and has_prev else None
+    return posts, next_cursor, prev_cursor
+
+
 @blog_bp.route('/blog')
+@page_cache.cached
 def index():
     """显示博客列表页"""
-    # 优化：直接在数据库层过滤，而不是加载所有文章后再过滤
-    if session.get('logged_in'):
+    logged_in = bool(session.get('logged_in'))
+
+    # 条件请求：任一文章写入都会递增内容版本号，版本号未变则列表未变，直接返回 304
+    generation, last_modified = SiteState.get_content_state()
+    etag = make_etag('blog.index', generation, logged_in)
+    # 登录前后页面内容不同，而修改时间无法区分两者：登录用户的响应不带 Last-Modified，只用 ETag 校验
+    if logged_in:
+        last_modified = None
+    resp = not_modified(etag, last_modified, private=logged_in)
+    if resp is not None:
+        return resp
+
+    # 优化：直接在数据库层过滤，而不是加载所有文章后再过滤；列表只加载元数据列
+    if logged_in:
         # 已登录用户可见所有文章
-        visible_posts = Post.query.order_by(Post.date_posted.desc()).all()
+        query = Post.summary_query()
     else:
         # 未登录用户只能看到 published 状态的文章
-        visible_posts = Post.query.filter(Post.status != 'hidden')\
-                                  .order_by(Post.date_posted.desc()).all()
+        query = Post.summary_query().filter(Post.status != 'hidden')
 
-    return render_template('blog_index.html', posts=visible_posts, login_status=session.get('logged_in'))
+    # 优化：游标分页，每次请求只读取一页，开销与文章总数无关
+    per_page = current_app.config['POSTS_PER_PAGE']
+    visible_posts, next_cursor, prev_cursor = _keyset_page(
+        query, per_page,
+        after=_decode_cursor(request.args.get('after')),
+        before=_decode_cursor(request.args.get('before'))
+    )
+
+    resp = make_response(render_template('blog_index.html',
+                                         posts=visible_posts,
+                                         next_cursor=next_cursor,
+                                         prev_cursor=prev_cursor,
+                                         login_status=logged_in))
+    return add_validators(resp, etag, last_modified, private=logged_in)
+
+
+@blog_bp.route('/blog/search')
+@page_cache.cached
+def search():
+    """全文搜索文章"""
+    logged_in = bool(session.get('logged_in'))
+    q = (request.args.get('q') or '').strip()
+
+    results = []
+    if q:
+        # 未登录用户只能搜到非 hidden 的文章
+        ids = PostSearch.search(q, include_hidden=logged_in,
+                                limit=current_app.config['SEARCH_RESULTS_LIMIT'])
+        if ids:
+            posts = Post.query.options(load_only(
+                Post.id, Post.title, Post.author_name, Post.date_posted, Post.status, Post.content
+            )).filter(Post.id.in_(ids)).all()
+            by_id = {p.id: p for p in posts}
+            # 保持相关度顺序
+            results = [{
+                'post': by_id[i],
+                'title': highlight(by_id[i].title, q),
+                'snippet': make_snippet(by_id[i].content, q),
+            } for i in ids if i in by_id]
+
+    return render_template('search.html', q=q, results=results, login_status=logged_in)
 
 
 @blog_bp.route('/post_detail/<int:post_id>')
+@page_cache.cached
 def post_detail(post_id):
     """显示文章详情页"""
-    post = Post.query.get_or_404(post_id)
+    logged_in = bool(session.get('logged_in'))
 
-    if post.status == 'hidden' and not session.get('logged_in'):
+    # 条件请求：先只读取校验所需的列，命中时不加载正文、不渲染模板
+    meta = db.session.execute(
+        select(Post.status, Post.updated_at, Post.content_hash, Post.render_version)
+        .where(Post.id == post_id)
+    ).first()
+    if meta is None:
+        abort(404)
+
+    if meta.status == 'hidden' and not logged_in:
         return render_template("404.html"), 404
 
-    # 优化：使用缓存的 HTML，如果没有则重新渲染
-    if post.rendered_html:
-        post_html_from_md_body = post.rendered_html
-    else:
-        # 首次访问或缓存失效，重新渲染并保存
-        post_html_from_md_body = post.render_content()
-        from extensions import db
-        db.session.commit()
+    etag = make_etag('blog.post_detail', post_id, meta.updated_at, meta.content_hash, meta.render_version)
+    # 登录用户的响应不带 Last-Modified（原因同 index），只用 ETag 校验
+    last_modified = None if logged_in else meta.updated_at
+    resp = not_modified(etag, last_modified, private=logged_in)
+    if resp is not None:
+        return resp
+
+    post = Post.query.get_or_404(post_id)
+
+    # 优化：使用缓存的 HTML；缓存缺失、正文变化或渲染器升级时重新渲染（同一文章并发请求只渲染一次），
+    # 写回数据库交给后台线程，访客请求不产生写入
+    stale = post.is_render_stale
+    post_render_cache.inc(result='miss' if stale else 'hit')
+    if stale:
+        render_writer.fill(post)
+        # 渲染缓存键已变化，校验值按新的渲染结果计算（写回不改变 updated_at）
+        etag = make_etag('blog.post_detail', post_id, post.updated_at, post.content_hash, post.render_version)
+    post_html_from_md_body = post.rendered_html
 
     site_title = "Post | " + post.title
 
-    return render_template("single_post.html",
-                          post=post,
-                          post_html_from_md_body=post_html_from_md_body,
-                          title=site_title)
+    resp = make_response(render_template("single_post.html",
+                                         post=post,
+                                         post_html_from_md_body=post_html_from_md_body,
+                                         toc=post.toc,
+                                         word_count=post.word_count,
+                                         reading_minutes=post.reading_minutes,
+                                         title=site_title))
+    return add_validators(resp, etag, last_modified, private=logged_in)
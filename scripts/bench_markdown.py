@@ -0,0 +1,85 @@
+"""Markdown 渲染微基准：对比「每次新建 Markdown 实例」与 render_md 的线程内复用实例
+
+用法（在项目根目录执行）：
+    python scripts/bench_markdown.py [-n 次数] [--threads 线程数]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import markdown
+
+from utils.markdown_helper import render_md, MD_EXTENSIONS, MD_EXTENSION_CONFIGS
+
+
+def render_md_fresh(text: str) -> str:
+    """旧实现：每次调用都新建 Markdown 实例并加载全部扩展"""
+    return markdown.markdown(
+        text or "",
+        extensions=MD_EXTENSIONS,
+        extension_configs=MD_EXTENSION_CONFIGS
+    )
+
+
+def load_samples() -> list[str]:
+    """读取 samples/posts 中的示例文章，并附加几个覆盖脚注/目录/代码块的小片段"""
+    docs = []
+    for path in sorted(glob.glob('samples/posts/*.md')):
+        with open(path, 'r', encoding='utf-8') as f:
+            docs.append(f.read())
+    docs += [
+        '',
+        '# 标题\n\n正文[^1]\n\n[^1]: 脚注',
+        '## 小节\n\n```python\nprint("hi")\n```\n\n| a | b |\n|---|---|\n| 1 | 2 |',
+        '[ref]: http://example.com\n\n[链接][ref]',
+    ]
+    return docs
+
+
+def bench(fn, docs: list[str], n: int, threads: int) -> float:
+    """以给定线程数执行 n 轮渲染，返回总耗时（秒）"""
+    def run(_):
+        for d in docs:
+            fn(d)
+
+    start = time.perf_counter()
+    if threads <= 1:
+        for i in range(n):
+            run(i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as ex:
+            list(ex.map(run, range(n)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Markdown 渲染微基准')
+    parser.add_argument('-n', type=int, default=200, help='渲染轮数（每轮渲染全部样本）')
+    parser.add_argument('--threads', type=int, default=2, help='并发线程数（对应 gunicorn 每个 worker 的线程数）')
+    args = parser.parse_args()
+
+    docs = load_samples()
+
+    # 1. 校验输出逐字节一致（交替调用，确保复用实例不会残留上一次的状态）
+    for d in docs + docs[::-1]:
+        if render_md(d) != render_md_fresh(d):
+            print('[错误] render_md 输出与新建实例不一致')
+            sys.exit(1)
+    print(f'[OK] {len(docs)} 个样本输出一致')
+
+    # 2. 计时
+    rounds = args.n * len(docs)
+    t_fresh = bench(render_md_fresh, docs, args.n, args.threads)
+    t_pooled = bench(render_md, docs, args.n, args.threads)
+    print(f'新建实例: {t_fresh:.3f}s  ({t_fresh / rounds * 1e3:.3f} ms/次)')
+    print(f'复用实例: {t_pooled:.3f}s  ({t_pooled / rounds * 1e3:.3f} ms/次)')
+    print(f'加速比: {t_fresh / t_pooled:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
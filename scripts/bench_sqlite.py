@@ -0,0 +1,153 @@
+"""SQLite 并发读写基准：对比默认连接参数与 SQLite 生产配置（WAL、busy_timeout、mmap、页缓存）
+
+多个读进程（模拟 gunicorn worker 处理文章详情）持续按主键读取文章，同时一个写进程持续更新渲染缓存，
+统计读取吞吐、读取延迟分位数与 database is locked 错误数。
+
+用法（在项目根目录执行）：
+    python scripts/bench_sqlite.py [--readers 4] [--duration 5] [--posts 500] [--profile both|default|tuned]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from utils.sqlite_profile import sqlite_pragmas, install_pragmas
+
+# 与 config.Config 默认值一致的生产配置
+TUNED = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT': 5000,
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+    'SQLITE_CACHE_SIZE': -64 * 1024,
+    'SQLITE_TEMP_STORE': 'MEMORY',
+}
+
+
+def make_engine(path: str, tuned: bool):
+    engine = create_engine(f'sqlite:///{path}')
+    if tuned:
+        install_pragmas(engine, sqlite_pragmas(TUNED))
+    return engine
+
+
+def prepare_db(path: str, posts: int, tuned: bool):
+    """创建与 post 表结构相近的测试库，正文与渲染缓存各约 8KB"""
+    engine = make_engine(path, tuned)
+    body = '正文内容 lorem ipsum ' * 400
+    with engine.begin() as conn:
+        if not tuned:
+            conn.execute(text('PRAGMA journal_mode=DELETE'))
+        conn.execute(text(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, title TEXT, content TEXT, '
+            'rendered_html TEXT, updated_at REAL)'
+        ))
+        conn.execute(
+            text('INSERT INTO post (id, title, content, rendered_html, updated_at) VALUES (:id, :t, :c, :h, 0)'),
+            [{'id': i, 't': f'文章 {i}', 'c': body, 'h': f'<p>{body}</p>'} for i in range(1, posts + 1)],
+        )
+    engine.dispose()
+
+
+def reader(path, tuned, posts, deadline, queue):
+    engine = make_engine(path, tuned)
+    latencies, errors = [], 0
+    with engine.connect() as conn:
+        while time.time() < deadline:
+            post_id = random.randint(1, posts)
+            start = time.perf_counter()
+            try:
+                conn.execute(text('SELECT title, rendered_html FROM post WHERE id = :id'), {'id': post_id}).first()
+                conn.commit()
+            except OperationalError:
+                errors += 1
+                conn.rollback()
+                continue
+            latencies.append(time.perf_counter() - start)
+    queue.put(('reader', latencies, errors))
+
+
+def writer(path, tuned, posts, deadline, queue):
+    engine = make_engine(path, tuned)
+    writes, errors = 0, 0
+    html = '<p>' + '重新渲染的内容 ' * 1000 + '</p>'
+    with engine.connect() as conn:
+        while time.time() < deadline:
+            try:
+                conn.execute(
+                    text('UPDATE post SET rendered_html = :h, updated_at = :u WHERE id = :id'),
+                    {'h': html, 'u': time.time(), 'id': random.randint(1, posts)},
+                )
+                conn.commit()
+                writes += 1
+            except OperationalError:
+                errors += 1
+                conn.rollback()
+    queue.put(('writer', writes, errors))
+
+
+def run(profile: str, args) -> dict:
+    tuned = profile == 'tuned'
+    workdir = tempfile.mkdtemp(prefix='bench_sqlite_')
+    path = os.path.join(workdir, 'bench.db')
+    try:
+        prepare_db(path, args.posts, tuned)
+        queue = mp.Queue()
+        deadline = time.time() + args.duration
+        procs = [mp.Process(target=reader, args=(path, tuned, args.posts, deadline, queue))
+                 for _ in range(args.readers)]
+        procs.append(mp.Process(target=writer, args=(path, tuned, args.posts, deadline, queue)))
+        for p in procs:
+            p.start()
+        results = [queue.get() for _ in procs]
+        for p in procs:
+            p.join()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = sorted(x for kind, lat, _ in results if kind == 'reader' for x in lat)
+    read_errors = sum(e for kind, _, e in results if kind == 'reader')
+    writes, write_errors = next((w, e) for kind, w, e in results if kind == 'writer')
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1e3 if latencies else 0.0
+
+    return {
+        'reads_per_sec': len(latencies) / args.duration,
+        'p50_ms': pct(0.50),
+        'p99_ms': pct(0.99),
+        'max_ms': latencies[-1] * 1e3 if latencies else 0.0,
+        'read_errors': read_errors,
+        'writes_per_sec': writes / args.duration,
+        'write_errors': write_errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 并发读写基准')
+    parser.add_argument('--readers', type=int, default=4, help='读进程数（对应 gunicorn worker 数）')
+    parser.add_argument('--duration', type=float, default=5, help='每种配置的运行秒数')
+    parser.add_argument('--posts', type=int, default=500, help='测试文章数')
+    parser.add_argument('--profile', choices=['both', 'default', 'tuned'], default='both')
+    args = parser.parse_args()
+
+    profiles = ['default', 'tuned'] if args.profile == 'both' else [args.profile]
+    print(f'{args.readers} 个读进程 + 1 个写进程，每种配置运行 {args.duration:g}s')
+    for profile in profiles:
+        r = run(profile, args)
+        print(f"[{profile:>7}] 读取 {r['reads_per_sec']:.0f}/s  "
+              f"p50 {r['p50_ms']:.2f}ms  p99 {r['p99_ms']:.2f}ms  max {r['max_ms']:.1f}ms  "
+              f"读取失败 {r['read_errors']}  |  写入 {r['writes_per_sec']:.0f}/s  写入失败 {r['write_errors']}")
+
+
+if __name__ == '__main__':
+    main()
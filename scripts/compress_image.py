@@ -1,47 +1,261 @@
+"""图片批量压缩：将 PNG / JPG 转换为多尺寸 WebP（可选 AVIF），并生成 srcset 清单
+
+- 增量：源文件 mtime/大小未变时直接跳过；变化时比较内容哈希，内容相同只刷新记录
+- 并行：编码任务分发到进程池
+- 清单：输出目录下的 manifest.json 记录每张图片的原始尺寸与各宽度变体，供页面生成 srcset
+
+用法（在项目根目录执行）：
+    python scripts/compress_image.py [--src docs/images] [--out docs/images/webp_output]
+        [--widths 480,960,1600] [--quality 80] [--avif] [--avif-quality 55]
+        [--workers N] [--force]
+"""
+import argparse
+import hashlib
+import json
 import os
-from PIL import Image
-
-# ----- 配置 -----
-
-SOURCE_DIR = 'docs/images'         # 原始图片文件夹
-OUTPUT_DIR = 'docs/images/webp_output'    # 存放的文件夹
-QUALITY = 80                  # 有损压缩的质量 (1-100)
-# ------------------
-
-# 1. 确保输出文件夹存在
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
-
-print(f"开始转换: '{SOURCE_DIR}' -> '{OUTPUT_DIR}'")
-
-# 2. 遍历源文件夹中的所有文件
-for filename in os.listdir(SOURCE_DIR):
-    # 构造完整的文件路径
-    file_path = os.path.join(SOURCE_DIR, filename)
-    
-    # 检查是否是文件，以及是否是我们要的图片格式
-    if os.path.isfile(file_path) and filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-        
-        # 构造输出文件名
-        # 'image.png' -> 'image.webp'
-        new_filename = os.path.splitext(filename)[0] + '.webp'
-        output_path = os.path.join(OUTPUT_DIR, new_filename)
-
-        try:
-            # 使用 'with' 语句打开图片，更安全
-            with Image.open(file_path) as img:
-                
-                # 3. 根据原始格式决定压缩策略
-                if filename.lower().endswith('.png'):
-                    # PNGs (logo, 截图) -> 使用无损
-                    img.save(output_path, format='WebP', lossless=True)
-                    print(f"[无损] {filename} -> {new_filename}")
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image, ImageOps, features
+
+SOURCE_EXTS = ('.png', '.jpg', '.jpeg')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def file_hash(path: str) -> str:
+    """计算文件内容的 sha256"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def find_sources(src_dir: str, out_dir: str) -> list[str]:
+    """递归查找源图片，返回相对 src_dir 的路径（跳过输出目录本身）"""
+    out_abs = os.path.abspath(out_dir)
+    found = []
+    for root, dirs, files in os.walk(src_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != out_abs)
+        for name in sorted(files):
+            if name.lower().endswith(SOURCE_EXTS):
+                found.append(os.path.relpath(os.path.join(root, name), src_dir).replace(os.sep, '/'))
+    return found
+
+
+def variant_name(rel: str, width: int, full_width: int, fmt: str) -> str:
+    """变体文件名：原尺寸为 name.<fmt>（与旧脚本输出一致），缩小尺寸为 name-<w>w.<fmt>"""
+    stem = os.path.splitext(rel)[0]
+    if width == full_width:
+        return f'{stem}.{fmt}'
+    return f'{stem}-{width}w.{fmt}'
+
+
+def target_widths(full_width: int, widths: list[int]) -> list[int]:
+    """需要输出的宽度：小于原图宽度的配置宽度，加上原图宽度本身（不放大）"""
+    return sorted({w for w in widths if w < full_width} | {full_width})
+
+
+def encode_image(task: dict) -> dict:
+    """进程池任务：将一张图片编码为全部宽度 / 格式的变体，返回清单记录"""
+    src_path = task['src_path']
+    rel = task['rel']
+    settings = task['settings']
+    lossless = rel.lower().endswith('.png')
+
+    with Image.open(src_path) as img:
+        # 按 EXIF 方向摆正，避免手机照片旋转错误
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+        full_width, full_height = img.size
+
+        variants = {}
+        for fmt in settings['formats']:
+            items = []
+            for width in target_widths(full_width, settings['widths']):
+                height = round(full_height * width / full_width)
+                resized = img if width == full_width else img.resize((width, height), Image.LANCZOS)
+                name = variant_name(rel, width, full_width, fmt)
+                out_path = os.path.join(task['out_dir'], name)
+                os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                if fmt == 'webp':
+                    # PNG（logo、截图）使用无损，JPG（照片）使用有损质量
+                    if lossless:
+                        resized.save(out_path, format='WebP', lossless=True, method=6)
+                    else:
+                        resized.save(out_path, format='WebP', quality=settings['quality'], method=6)
                 else:
-                    # JPGs (照片) -> 使用有损质量
-                    img.save(output_path, format='WebP', quality=QUALITY)
-                    print(f"[质量 {QUALITY}] {filename} -> {new_filename}")
+                    resized.save(out_path, format='AVIF', quality=settings['avif_quality'])
+                items.append({'path': name, 'width': width, 'height': height,
+                              'bytes': os.path.getsize(out_path)})
+            variants[fmt] = items
+
+    return {
+        'rel': rel,
+        'entry': {
+            'hash': task['hash'],
+            'mtime': task['mtime'],
+            'size': task['size'],
+            'width': full_width,
+            'height': full_height,
+            'variants': variants,
+        },
+    }
+
+
+def load_manifest(path: str) -> dict:
+    """读取清单，不存在或版本不符时返回空清单"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != MANIFEST_VERSION:
+        return {}
+    return data
+
+
+def outputs_exist(out_dir: str, entry: dict) -> bool:
+    """清单记录的全部变体文件是否仍然存在"""
+    return all(os.path.exists(os.path.join(out_dir, item['path']))
+               for items in entry['variants'].values() for item in items)
+
+
+def remove_outputs(out_dir: str, entry: dict, keep: set[str] = frozenset()):
+    """删除一条记录的变体文件（keep 中的文件保留）"""
+    for items in entry['variants'].values():
+        for item in items:
+            if item['path'] in keep:
+                continue
+            try:
+                os.remove(os.path.join(out_dir, item['path']))
+            except FileNotFoundError:
+                pass
+
+
+def parse_widths(value: str) -> list[int]:
+    try:
+        widths = sorted({int(w) for w in value.split(',') if w.strip()})
+    except ValueError:
+        raise argparse.ArgumentTypeError('宽度需为逗号分隔的整数，例如 480,960,1600')
+    if not widths or widths[0] <= 0:
+        raise argparse.ArgumentTypeError('宽度需为正整数')
+    return widths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量将图片转换为多尺寸 WebP / AVIF 并生成 srcset 清单')
+    parser.add_argument('--src', default='docs/images', help='原始图片文件夹（默认 docs/images）')
+    parser.add_argument('--out', default='docs/images/webp_output', help='输出文件夹（默认 docs/images/webp_output）')
+    parser.add_argument('--widths', type=parse_widths, default=[480, 960, 1600],
+                        help='输出宽度，逗号分隔（默认 480,960,1600；不会超过原图宽度）')
+    parser.add_argument('--quality', type=int, default=80, help='WebP 有损压缩质量 1-100（默认 80，PNG 始终无损）')
+    parser.add_argument('--avif', action='store_true', help='额外输出 AVIF 变体')
+    parser.add_argument('--avif-quality', type=int, default=55, help='AVIF 压缩质量 1-100（默认 55）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='并行进程数（默认 CPU 核数）')
+    parser.add_argument('--force', action='store_true', help='忽略清单，重新编码全部图片')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.src):
+        print(f"[错误] 源文件夹不存在: '{args.src}'")
+        sys.exit(1)
+    if args.avif and not features.check('avif'):
+        print('[错误] 当前 Pillow 不支持 AVIF 编码，请升级 Pillow（>= 11.3）或去掉 --avif')
+        sys.exit(1)
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest_path = os.path.join(args.out, MANIFEST_NAME)
+    settings = {
+        'widths': args.widths,
+        'quality': args.quality,
+        'formats': ['webp', 'avif'] if args.avif else ['webp'],
+        'avif_quality': args.avif_quality,
+    }
+
+    manifest = load_manifest(manifest_path)
+    # 编码参数变化时旧变体全部作废
+    old_images = manifest.get('images', {}) if manifest.get('settings') == settings else {}
+    if manifest.get('images') and not old_images:
+        print('编码参数已变化，将重新编码全部图片')
+    images = {}
+
+    print(f"开始转换: '{args.src}' -> '{args.out}'")
+    start = time.perf_counter()
+
+    # 1. 找出需要重新编码的图片
+    tasks = []
+    skipped = 0
+    for rel in find_sources(args.src, args.out):
+        src_path = os.path.join(args.src, rel)
+        stat = os.stat(src_path)
+        old = old_images.get(rel)
+        if old and not args.force and outputs_exist(args.out, old):
+            if old['mtime'] == stat.st_mtime and old['size'] == stat.st_size:
+                images[rel] = old
+                skipped += 1
+                continue
+            digest = file_hash(src_path)
+            if old['hash'] == digest:
+                # 仅 mtime 变化（如重新检出），内容相同无需重新编码
+                images[rel] = dict(old, mtime=stat.st_mtime, size=stat.st_size)
+                skipped += 1
+                continue
+        else:
+            digest = file_hash(src_path)
+        tasks.append({
+            'src_path': src_path,
+            'rel': rel,
+            'out_dir': args.out,
+            'hash': digest,
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'settings': settings,
+        })
+
+    # 2. 并行编码
+    failed = 0
+    if tasks:
+        workers = max(1, min(args.workers, len(tasks)))
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = {ex.submit(encode_image, task): task['rel'] for task in tasks}
+            for future in as_completed(futures):
+                rel = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"转换失败 {rel}: {e}")
+                    failed += 1
+                    # 保留旧记录，避免一次失败导致页面引用的变体丢失
+                    if rel in old_images:
+                        images[rel] = old_images[rel]
+                    continue
+                entry = result['entry']
+                images[rel] = entry
+                sizes = ', '.join(f"{fmt} {len(items)} 个" for fmt, items in entry['variants'].items())
+                print(f"[完成] {rel} ({entry['width']}x{entry['height']}) -> {sizes}")
+
+    # 3. 清理已删除源图片或已不再输出的变体
+    removed = 0
+    keep = {item['path'] for entry in images.values()
+            for items in entry['variants'].values() for item in items}
+    for rel, entry in manifest.get('images', {}).items():
+        if rel not in images:
+            removed += 1
+        remove_outputs(args.out, entry, keep)
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'settings': settings, 'images': images},
+                  f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    elapsed = time.perf_counter() - start
+    print(f"--- 批量转换完成! 编码 {len(tasks) - failed} 张，跳过 {skipped} 张，"
+          f"失败 {failed} 张，清理 {removed} 张，用时 {elapsed:.2f}s ---")
+    if failed:
+        sys.exit(1)
 
-        except Exception as e:
-            print(f"转换失败 {filename}: {e}")
 
-print("--- 批量转换完成! ---")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,20 @@
+import argparse
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 from getpass import getpass
 
+from sqlalchemy import select, insert, update
+
 # 导入 Flask 应用上下文和模型
 from app import create_app
 from extensions import db
-from models import Admin, Post
+from models import Admin, Post, SiteState, PostSearch
+from utils.render_pool import RenderPool
+from utils.sql_profiler import profile_queries
 
 # 创建应用实例
 app = create_app()
@@ -51,6 +59,148 @@ def parse_date(s: str | None) -> datetime:
     return datetime.utcnow()
 
 
+# ---------------
+# 批量导入
+# ---------------
+
+def _read_md(path: str) -> str | None:
+    """读取 MD 文件，不存在时返回 None"""
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as mf:
+        return mf.read()
+
+
+def import_posts(json_path: str, md_dir: str, mode: str,
+                 workers: int | None = None, chunk_size: int = 200) -> dict | None:
+    """批量导入 JSON + MD 到数据库（需在应用上下文中调用）
+
+    流程：一次查询预加载已有标题 -> 并发读取 MD 文件 -> 多进程预渲染 -> 分批写入并提交
+
+    参数:
+      mode: skip（跳过已存在）/ overwrite（按标题覆盖）/ clear（清空后导入）
+      workers: 渲染进程数，默认使用全部 CPU 核心
+      chunk_size: 每个事务写入的文章数
+
+    返回:
+      统计信息 dict；JSON 读取失败时返回 None
+    """
+    start = time.perf_counter()
+    stats = {'created': 0, 'updated': 0, 'skipped': 0, 'md_missing': 0}
+
+    print(f"读取 JSON: {json_path}")
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        print('[错误] 找不到 JSON 文件。')
+        return None
+    except json.JSONDecodeError as e:
+        print(f'[错误] JSON 解析失败: {e}')
+        return None
+
+    if mode == 'clear':
+        print('清空现有文章...')
+        Post.query.delete()
+        # 批量删除不经过 flush，需手动递增内容版本号
+        SiteState.bump_generation()
+        # 立即提交：没有可导入的条目时，后续流程不会再提交
+        db.session.commit()
+
+    # 1. 一次查询预加载已有标题（同名时以 ID 最小者为准）
+    existing = dict(db.session.execute(
+        select(Post.title, Post.id).order_by(Post.id.desc())
+    ).all())
+
+    # 2. 解析条目，确定每个标题的操作
+    plan = {}
+    for idx, entry in enumerate(entries, start=1):
+        title = (entry.get('title') or '').strip()
+        if not title:
+            print(f"[{idx}] 跳过：缺少 title")
+            stats['skipped'] += 1
+            continue
+        if mode == 'skip' and (title in existing or title in plan):
+            print(f"[{idx}] 跳过(已存在): {title}")
+            stats['skipped'] += 1
+            continue
+
+        # 兼容不同键名
+        date_s = entry.get('date') or entry.get('date_posted')
+        plan[title] = (idx, {
+            'title': title,
+            'author_name': (entry.get('author_name') or entry.get('author') or 'YewFence').strip(),
+            'brief_summary': entry.get('brief_summary') or '',
+            'date_posted': parse_date(date_s),
+            'status': (entry.get('status') or 'hidden').strip().lower(),
+            'note': entry.get('note') or '',
+        })
+
+    # 3. 并发读取 MD 文件
+    titles = list(plan)
+    md_paths = [os.path.join(md_dir, f"{title}.md") for title in titles]
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as ex:
+        contents = list(ex.map(_read_md, md_paths))
+
+    items = []
+    for title, md_path, md_content in zip(titles, md_paths, contents):
+        idx, row = plan[title]
+        if md_content is None:
+            print(f"[{idx}] [缺少MD] {md_path}")
+            stats['md_missing'] += 1
+            if mode == 'skip':
+                stats['skipped'] += 1
+                continue
+            # 覆盖或清空模式下，没有 MD 也可只更新元数据/创建空内容
+            md_content = ''
+        row['content'] = md_content
+        items.append((idx, row))
+
+    # 4. 多进程预渲染，分批写入（每批一个事务），导入后渲染缓存即为最新
+    chunk_size = max(1, chunk_size)
+    done = 0
+    with RenderPool(workers) as pool:
+        for i in range(0, len(items), chunk_size):
+            chunk = items[i:i + chunk_size]
+            rendered = dict(pool.render([(row['title'], row['title'], row['content']) for _, row in chunk]))
+            inserts, updates = [], []
+            for idx, row in chunk:
+                row.update(rendered[row['title']])
+                post_id = existing.get(row['title'])
+                if post_id is None:
+                    inserts.append(row)
+                    stats['created'] += 1
+                    print(f"[{idx}] 创建: {row['title']}")
+                else:
+                    updates.append({'id': post_id, **row})
+                    stats['updated'] += 1
+                    print(f"[{idx}] 覆盖: {row['title']}")
+
+            if inserts:
+                db.session.execute(insert(Post), inserts)
+            if updates:
+                db.session.execute(update(Post), updates)
+            # 批量写入不经过 flush，需手动递增内容版本号
+            SiteState.bump_generation()
+            db.session.commit()
+            done += len(chunk)
+            print(f"已写入 {done}/{len(items)}")
+
+    # 5. 批量写入不会触发 ORM 事件，导入后重建全文索引
+    if PostSearch.available():
+        print('重建全文索引...')
+        PostSearch.rebuild()
+        db.session.commit()
+
+    stats['elapsed'] = time.perf_counter() - start
+    return stats
+
+
+def print_post_stats(stats: dict):
+    print(f" - 文章 创建: {stats['created']}，更新: {stats['updated']}，跳过: {stats['skipped']}，"
+          f"缺少MD: {stats['md_missing']}，用时: {stats['elapsed']:.2f}s")
+
+
 def migrate():
     print('安全提示：该脚本会修改数据库，建议先备份 data.db。')
     if not ask_yn('你确定要继续吗？', default='n'):
@@ -125,90 +275,62 @@ def migrate():
                     print(f"更新管理员密码: {admin_username}")
                     admin.set_password(admin_password)
 
-            created = updated = skipped = md_missing = 0
-
             # 文章
+            stats = None
             if do_posts:
-                if mode == 'clear':
-                    print('清空现有文章...')
-                    Post.query.delete()
-
-                print(f"读取 JSON: {json_path}")
-                try:
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        entries = json.load(f)
-                except FileNotFoundError:
-                    print('[错误] 找不到 JSON 文件。')
-                    return
-                except json.JSONDecodeError as e:
-                    print(f'[错误] JSON 解析失败: {e}')
+                stats = import_posts(json_path, md_dir, mode)
+                if stats is None:
+                    db.session.rollback()
                     return
 
-                for idx, entry in enumerate(entries, start=1):
-                    title = (entry.get('title') or '').strip()
-                    if not title:
-                        print(f"[{idx}] 跳过：缺少 title")
-                        skipped += 1
-                        continue
-
-                    # 兼容不同键名
-                    author = (entry.get('author_name') or entry.get('author') or 'YewFence').strip()
-                    date_s = entry.get('date') or entry.get('date_posted')
-                    brief = entry.get('brief_summary') or ''
-                    status = (entry.get('status') or 'hidden').strip().lower()
-                    note = entry.get('note') or ''
-
-                    md_path = os.path.join(md_dir, f"{title}.md")
-                    if not os.path.isfile(md_path):
-                        print(f"[{idx}] [缺少MD] {md_path}")
-                        md_missing += 1
-                        if mode == 'skip':
-                            skipped += 1
-                            continue
-                        # 覆盖或清空模式下，没有 MD 也可只更新元数据/创建空内容
-                        md_content = ''
-                    else:
-                        with open(md_path, 'r', encoding='utf-8') as mf:
-                            md_content = mf.read()
-
-                    existing = Post.query.filter_by(title=title).first()
-                    if existing is None:
-                        post = Post(
-                            title=title,
-                            author_name=author,
-                            brief_summary=brief,
-                            content=md_content,
-                            date_posted=parse_date(date_s),
-                            status=status,
-                            note=note
-                        )
-                        db.session.add(post)
-                        created += 1
-                        print(f"[{idx}] 创建: {title}")
-                    else:
-                        if mode == 'skip':
-                            skipped += 1
-                            print(f"[{idx}] 跳过(已存在): {title}")
-                        else:  # overwrite 或 clear 后导入
-                            existing.author_name = author
-                            existing.brief_summary = brief
-                            existing.content = md_content
-                            existing.date_posted = parse_date(date_s)
-                            existing.status = status
-                            existing.note = note
-                            updated += 1
-                            print(f"[{idx}] 覆盖: {title}")
-
             db.session.commit()
             print('\n迁移完成。')
             if do_admin:
                 print(' - 管理员设置已应用。')
-            if do_posts:
-                print(f' - 文章 创建: {created}，更新: {updated}，跳过: {skipped}，缺少MD: {md_missing}')
+            if stats is not None:
+                print_post_stats(stats)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[严重错误] 发生异常：{e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='数据库初始化/变更脚本。不带参数时进入交互模式；'
+                    '指定 --import 时以非交互方式批量导入文章。'
+    )
+    parser.add_argument('--import', dest='json_path', metavar='JSON', help='blog.json 的路径')
+    parser.add_argument('--md-dir', default='samples/posts', help='.md 文件所在文件夹（默认 samples/posts）')
+    parser.add_argument('--mode', choices=['skip', 'overwrite', 'clear'], default='overwrite',
+                        help='覆盖策略（默认 overwrite）')
+    parser.add_argument('--workers', type=int, default=None, help='渲染进程数（默认使用全部 CPU 核心）')
+    parser.add_argument('--chunk-size', type=int, default=200, help='每个事务写入的文章数（默认 200）')
+    parser.add_argument('--profile-sql', action='store_true', help='导入结束后输出 SQL 语句统计（次数、耗时、N+1 嫌疑）')
+    args = parser.parse_args()
+
+    if not args.json_path:
+        migrate()
+        return
+
+    with app.app_context():
+        try:
+            # 只在需要输出统计时记录语句，默认不产生额外开销
+            profiling = profile_queries('seed --import') if args.profile_sql else nullcontext()
+            with profiling as prof:
+                stats = import_posts(args.json_path, args.md_dir, args.mode,
+                                     workers=args.workers, chunk_size=args.chunk_size)
+            if prof is not None:
+                print(prof.report(app.config['SQL_PROFILER_REPEAT_THRESHOLD']))
+            if stats is None:
+                db.session.rollback()
+                raise SystemExit(1)
+            print('\n导入完成。')
+            print_post_stats(stats)
         except Exception as e:
             db.session.rollback()
             print(f"[严重错误] 发生异常：{e}")
+            raise SystemExit(1)
 
 
 if __name__ == '__main__':
-    migrate()
\ No newline at end of file
+    main()
@@ -198,6 +198,204 @@
     fStatus?.addEventListener('change', reflectStatusStyle);
   }
 
+  // 在线编辑：左侧编辑 Markdown，右侧按块增量预览，停止输入后自动保存
+  // 预览只提交客户端已有的块哈希，服务端只返回变化块的 HTML，长文编辑时不必整篇重新渲染
+  // 保存只上传相对上次保存内容的补丁，流量与改动大小相关，而与文章长度无关
+  function bindMdEditor() {
+    const mask = document.getElementById('mdEditorModal');
+    const textEl = document.getElementById('mdEditorText');
+    const previewEl = mask?.querySelector('.md-editor-preview');
+    const statusEl = document.getElementById('mdEditorStatus');
+    const titleEl = document.getElementById('mdEditorTitle');
+    const btnSave = document.getElementById('mdEditorSave');
+    if (!mask || !textEl || !previewEl) return;
+
+    const PREVIEW_DELAY = 300;
+    const AUTOSAVE_DELAY = 2000;
+    let postId = null;
+    let postTitle = '';
+    let savedText = '';
+    let revision = null;         // 服务端正文修订号，增量保存的基准
+    let saving = false;
+    let pendingSave = null;
+    let autosaveTimer = null;
+    let blockHtml = new Map();   // 块哈希 -> HTML
+    let previewTimer = null;
+    let previewSeq = 0;
+
+    const setStatus = (msg) => { if (statusEl) statusEl.textContent = msg || ''; };
+    const isDirty = () => textEl.value !== savedText;
+
+    // 按服务端给出的顺序拼装预览，未变化的块复用已有 DOM 节点
+    function applyPreview(blocks, html) {
+      for (const [key, value] of Object.entries(html)) blockHtml.set(key, value);
+      const pool = new Map();
+      for (const node of previewEl.children) {
+        const key = node.dataset.block;
+        if (!pool.has(key)) pool.set(key, []);
+        pool.get(key).push(node);
+      }
+      const nodes = blocks.map((key) => {
+        const reuse = pool.get(key)?.shift();
+        if (reuse) return reuse;
+        const div = document.createElement('div');
+        div.dataset.block = key;
+        div.innerHTML = blockHtml.get(key) || '';
+        return div;
+      });
+      previewEl.replaceChildren(...nodes);
+      // 只保留当前文档用到的块，known 列表不会无限增长
+      const current = new Set(blocks);
+      for (const key of [...blockHtml.keys()]) if (!current.has(key)) blockHtml.delete(key);
+    }
+
+    async function refreshPreview() {
+      const seq = ++previewSeq;
+      try {
+        const res = await fetch('/api/posts/preview/blocks', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ text: textEl.value, title: postTitle, known: [...blockHtml.keys()] })
+        });
+        const data = await res.json();
+        if (!res.ok || !data.ok) throw new Error(data.error || ('预览失败 ' + res.status));
+        // 较早发出的请求晚到时丢弃，避免覆盖更新的预览
+        if (seq !== previewSeq) return;
+        applyPreview(data.blocks, data.html);
+      } catch (err) {
+        if (seq === previewSeq) setStatus('预览失败：' + (err?.message || err));
+      }
+    }
+
+    function schedulePreview() {
+      clearTimeout(previewTimer);
+      previewTimer = setTimeout(refreshPreview, PREVIEW_DELAY);
+    }
+
+    async function open(row) {
+      postId = row.querySelector('.v-id')?.textContent?.trim();
+      postTitle = row.querySelector('.v-title')?.textContent || '';
+      if (!postId) { alert('无法获取文章 ID'); return; }
+      if (titleEl) titleEl.textContent = '在线编辑：' + postTitle;
+      textEl.value = '';
+      previewEl.replaceChildren();
+      blockHtml = new Map();
+      setStatus('加载中...');
+      mask.setAttribute('aria-hidden', 'false');
+      try {
+        const res = await fetch(`/api/posts/${postId}/md`, { cache: 'no-cache' });
+        if (!res.ok) throw new Error('加载失败 ' + res.status);
+        revision = res.headers.get('X-Content-Revision');
+        savedText = await res.text();
+        textEl.value = savedText;
+        setStatus('');
+        refreshPreview();
+      } catch (err) {
+        setStatus('加载失败：' + (err?.message || err));
+      }
+    }
+
+    async function close() {
+      if (isDirty() && !(await askConfirm('有尚未保存的修改，确定关闭吗？'))) return;
+      clearTimeout(previewTimer);
+      clearTimeout(autosaveTimer);
+      mask.setAttribute('aria-hidden', 'true');
+      postId = null;
+    }
+
+    // 计算从 a 到 b 的单个替换补丁（公共前缀 / 后缀之外的部分），下标为 UTF-16 码元
+    function textDiff(a, b) {
+      let start = 0;
+      const max = Math.min(a.length, b.length);
+      while (start < max && a.charCodeAt(start) === b.charCodeAt(start)) start++;
+      let endA = a.length;
+      let endB = b.length;
+      while (endA > start && endB > start && a.charCodeAt(endA - 1) === b.charCodeAt(endB - 1)) { endA--; endB--; }
+      return { start, end: endA, text: b.slice(start, endB) };
+    }
+
+    // 整篇覆盖（冲突时由用户确认后使用）
+    async function saveFull(text) {
+      const res = await fetch(`/api/posts/${postId}/md`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'text/markdown; charset=utf-8' },
+        body: text
+      });
+      const data = await res.json().catch(() => ({}));
+      if (!res.ok || !data.ok) throw new Error(data.error || ('保存失败 ' + res.status));
+      savedText = text;
+      revision = data.revision;
+    }
+
+    // 增量保存：只上传相对上次保存内容的补丁；render 为 true（手动保存）时服务端立即重新渲染
+    async function save(render = false) {
+      if (!postId) return;
+      clearTimeout(autosaveTimer);
+      if (saving) {
+        // 上一次保存尚未完成，结束后再保存一次
+        pendingSave = { render: render || (pendingSave?.render ?? false) };
+        return;
+      }
+      const text = textEl.value;
+      if (text === savedText && !render) return;
+      saving = true;
+      setStatus(render ? '保存中...' : '自动保存中...');
+      try {
+        const res = await fetch(`/api/posts/${postId}/md`, {
+          method: 'PATCH',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({
+            base: revision,
+            ops: text === savedText ? [] : [textDiff(savedText, text)],
+            render
+          })
+        });
+        const data = await res.json().catch(() => ({}));
+        if (res.status === 409) {
+          const ok = await askConfirm('服务器上的文章内容已被修改（可能在其他页面编辑过），是否用当前编辑内容覆盖？');
+          if (!ok) { setStatus('未保存：内容冲突'); return; }
+          await saveFull(text);
+        } else if (!res.ok || !data.ok) {
+          throw new Error(data.error || ('保存失败 ' + res.status));
+        } else {
+          savedText = text;
+          revision = data.revision;
+        }
+        setStatus((render ? '已保存 ' : '已自动保存 ') + new Date().toLocaleTimeString());
+      } catch (err) {
+        setStatus('保存失败：' + (err?.message || err));
+      } finally {
+        saving = false;
+        if (pendingSave) {
+          const next = pendingSave;
+          pendingSave = null;
+          save(next.render);
+        }
+      }
+    }
+
+    function scheduleAutosave() {
+      clearTimeout(autosaveTimer);
+      autosaveTimer = setTimeout(() => save(false), AUTOSAVE_DELAY);
+    }
+
+    document.getElementById('mgmtRoot')?.addEventListener('click', (e) => {
+      const btn = e.target.closest('[data-act="open-editor"]');
+      if (!btn) return;
+      const row = btn.closest('.blog-row');
+      if (row) open(row);
+    });
+    textEl.addEventListener('input', () => { schedulePreview(); scheduleAutosave(); });
+    btnSave?.addEventListener('click', () => save(true));
+    mask.addEventListener('click', (e) => {
+      if (e.target === mask || e.target.matches('[data-md-editor="close"]')) close();
+    });
+    textEl.addEventListener('keydown', (e) => {
+      // Ctrl/Cmd + S 保存
+      if ((e.ctrlKey || e.metaKey) && e.key === 's') { e.preventDefault(); save(true); }
+    });
+  }
+
   function initScrollToHash() {
     // 1. 检查当前 URL 是否包含锚点 (hash)
     if (window.location.hash) {
@@ -225,6 +423,7 @@
   function init() {
     document.querySelectorAll('.blog-row').forEach(bindRow);
     bindEditModal();
+    bindMdEditor();
     initScrollToHash();
 
     // 1) 删除文章：拦截点击，弹出确认
@@ -0,0 +1,20 @@
+from utils.assets import minify_js
+
+
+def test_minify_js_keeps_code_after_inline_comment():
+    assert minify_js('/* a */ var x = 1;\n') == 'var x = 1;\n'
+
+
+def test_minify_js_strips_trailing_comments():
+    src = 'var a = 1; // 行尾注释\nvar b = 2; /* 块注释 */\n'
+    assert minify_js(src) == 'var a = 1;\nvar b = 2;\n'
+
+
+def test_minify_js_strips_multiline_comment_opened_mid_line():
+    src = 'var y = 2; /* start\n  middle\nend */ var z = 3;\n'
+    assert minify_js(src) == 'var y = 2;\nvar z = 3;\n'
+
+
+def test_minify_js_keeps_comment_markers_inside_strings():
+    src = '    f("/* a */", \'// b\');\n    const t = `x\n  /* c */ y`;\n'
+    assert minify_js(src) == 'f("/* a */", \'// b\');\nconst t = `x\n  /* c */ y`;\n'
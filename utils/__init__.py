@@ -1,4 +1,6 @@
-from .markdown_helper import render_md, find_title_in_content, strip_md_title_if_matches
+from .markdown_helper import render_md, analyze_markdown, find_title_in_content, strip_md_title_if_matches
 from .decorators import login_required
+from .conditional import make_etag, not_modified, add_validators
 
-__all__ = ['render_md', 'find_title_in_content', 'strip_md_title_if_matches', 'login_required']
+__all__ = ['render_md', 'analyze_markdown', 'find_title_in_content', 'strip_md_title_if_matches', 'login_required',
+           'make_etag', 'not_modified', 'add_validators']
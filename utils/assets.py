@@ -0,0 +1,214 @@
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+from flask import request, send_from_directory, abort, current_app
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：未安装时只生成 .gz
+    brotli = None
+
+# 构建产物目录（相对 static/）与清单文件名
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+# 参与构建的静态资源
+ASSET_PATTERNS = (('css', '.css'), ('js', '.js'))
+# 带内容哈希的文件可以永久缓存
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_STRING_OR_COMMENT = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/''', re.S)
+# JS 额外识别模板字符串与行注释；普通字符串不跨行，未闭合的引号（如正则中的引号）不会吞掉后续代码
+_JS_STRING_OR_COMMENT = re.compile(
+    r'''("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)|/\*.*?\*/|//[^\n]*''', re.S)
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+# ---------------
+# 压缩
+# ---------------
+
+def minify_css(src: str) -> str:
+    """去掉注释并压缩空白（字符串内容保持不变）"""
+    out, pos = [], 0
+    for m in _STRING_OR_COMMENT.finditer(src):
+        out.append(_squeeze_css(src[pos:m.start()]))
+        if m.group(1):
+            out.append(m.group(1))
+        pos = m.end()
+    out.append(_squeeze_css(src[pos:]))
+    return ''.join(out).strip() + '\n'
+
+
+def _squeeze_css(s: str) -> str:
+    s = re.sub(r'\s+', ' ', s)
+    # 冒号前的空格在选择器中有意义（后代选择器 ":hover"），只去掉冒号后的空格
+    s = re.sub(r'\s*([{};,>])\s*', r'\1', s)
+    s = re.sub(r':\s+', ':', s)
+    return s.replace(';}', '}')
+
+
+def minify_js(src: str) -> str:
+    """保守压缩：去掉注释、缩进与空行，保留换行以免影响自动分号插入
+
+    与 minify_css 相同，按字符串（含模板字符串）与注释扫描，字符串内容原样保留，只删除注释本身，
+    注释前后的代码不受影响。不解析正则字面量，正则中不应出现引号或注释标记。
+    """
+    out, code, pos = [], [], 0
+    for m in _JS_STRING_OR_COMMENT.finditer(src):
+        code.append(src[pos:m.start()])
+        if m.group(1):
+            out.append(_squeeze_js(''.join(code)))
+            out.append(m.group(1))
+            code = []
+        else:
+            # 跨行的块注释替换为换行，避免前后两行代码合并改变自动分号插入的结果
+            code.append('\n' if '\n' in m.group(0) else ' ')
+        pos = m.end()
+    code.append(src[pos:])
+    out.append(_squeeze_js(''.join(code)))
+    return ''.join(out).strip() + '\n'
+
+
+def _squeeze_js(s: str) -> str:
+    # 去掉行尾空白、行首缩进与空行，换行本身保留
+    return re.sub(r'[ \t]*\n\s*', '\n', s)
+
+
+def _rewrite_css_urls(css: str, rel_path: str, static_url_path: str) -> str:
+    """构建产物位于 dist/ 下，将 CSS 中的相对 url() 改写为基于站点根目录的绝对路径"""
+    base = posixpath.dirname(f'{static_url_path}/{rel_path}')
+
+    def repl(m):
+        quote, target = m.group(1), m.group(2).strip()
+        if re.match(r'^(?:[a-z]+:|/|#)', target, re.I):
+            return m.group(0)
+        return f'url({quote}{posixpath.normpath(posixpath.join(base, target))}{quote})'
+    return _CSS_URL.sub(repl, css)
+
+
+# ---------------
+# 构建
+# ---------------
+
+def build_assets(static_folder: str, static_url_path: str, level: int = 9) -> dict:
+    """压缩并为静态资源生成带内容哈希的文件名，附带 .gz / .br 预压缩版本
+
+    返回:
+      清单 dict：原始路径（相对 static/）-> 构建产物路径（相对 static/）
+    """
+    dist_root = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+    for subdir, ext in ASSET_PATTERNS:
+        src_dir = os.path.join(static_folder, subdir)
+        if not os.path.isdir(src_dir):
+            continue
+        for name in sorted(os.listdir(src_dir)):
+            if not name.endswith(ext):
+                continue
+            rel = f'{subdir}/{name}'
+            with open(os.path.join(src_dir, name), 'r', encoding='utf-8') as f:
+                src = f.read()
+            if ext == '.css':
+                data = minify_css(_rewrite_css_urls(src, rel, static_url_path))
+            else:
+                data = minify_js(src)
+            raw = data.encode('utf-8')
+
+            digest = hashlib.sha256(raw).hexdigest()[:10]
+            out_rel = f'{DIST_DIR}/{subdir}/{name[:-len(ext)]}.{digest}{ext}'
+            out_path = os.path.join(static_folder, out_rel)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            with open(out_path, 'wb') as f:
+                f.write(raw)
+            # mtime=0 使 gzip 输出可复现
+            with open(out_path + '.gz', 'wb') as f:
+                f.write(gzip.compress(raw, compresslevel=level, mtime=0))
+            if brotli is not None:
+                with open(out_path + '.br', 'wb') as f:
+                    f.write(brotli.compress(raw, quality=11))
+            manifest[rel] = out_rel
+
+    # 清理不再被清单引用的旧产物
+    keep = set()
+    for out_rel in manifest.values():
+        p = os.path.join(static_folder, out_rel)
+        keep.update({p, p + '.gz', p + '.br'})
+    for root, _, files in os.walk(dist_root):
+        for name in files:
+            p = os.path.join(root, name)
+            if name != MANIFEST_NAME and p not in keep:
+                os.remove(p)
+
+    os.makedirs(dist_root, exist_ok=True)
+    with open(os.path.join(dist_root, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return manifest
+
+
+# ---------------
+# 运行时
+# ---------------
+
+class Assets:
+    """让 url_for('static', filename=...) 通过构建清单解析为带哈希的文件名，
+    并以 immutable 缓存、预压缩的方式提供这些文件"""
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_USE_MANIFEST', True)
+        app.extensions['assets'] = self
+        self.load_manifest(app)
+
+        @app.url_defaults
+        def _resolve_static(endpoint, values):
+            if endpoint == 'static' and self.manifest and app.config['ASSETS_USE_MANIFEST']:
+                filename = values.get('filename')
+                if filename in self.manifest:
+                    values['filename'] = self.manifest[filename]
+
+        # 比 /static/<path:filename> 更具体，构建产物由这里处理
+        app.add_url_rule(f'{app.static_url_path}/{DIST_DIR}/<path:filename>',
+                         endpoint='assets_dist', view_func=self._send_dist)
+
+    def load_manifest(self, app):
+        """读取构建清单；尚未构建时清单为空，url_for 保持原始文件名"""
+        path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def _send_dist(self, filename):
+        """按 Accept-Encoding 优先返回 .br / .gz 预压缩文件，不在请求时压缩"""
+        if filename.endswith(('.gz', '.br')):
+            abort(404)
+        dist = os.path.join(current_app.static_folder, DIST_DIR)
+        accept = request.accept_encodings
+        for suffix, encoding in (('.br', 'br'), ('.gz', 'gzip')):
+            if accept[encoding] and os.path.isfile(os.path.join(dist, filename + suffix)):
+                resp = send_from_directory(dist, filename + suffix, conditional=True,
+                                           mimetype=_guess_mimetype(filename))
+                resp.headers['Content-Encoding'] = encoding
+                break
+        else:
+            resp = send_from_directory(dist, filename, conditional=True)
+        resp.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        resp.vary.add('Accept-Encoding')
+        return resp
+
+
+def _guess_mimetype(filename: str) -> str:
+    if filename.endswith('.css'):
+        return 'text/css'
+    if filename.endswith('.js'):
+        return 'text/javascript'
+    return 'application/octet-stream'
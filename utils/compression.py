@@ -0,0 +1,79 @@
+import gzip
+
+from flask import request, current_app
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：未安装时只协商 gzip
+    brotli = None
+
+
+class Compress:
+    """按 Accept-Encoding 协商，对 HTML / JSON 等文本响应做 br 或 gzip 压缩
+
+    - 流式响应（导出接口）、文件响应（send_file）与已带 Content-Encoding 的响应不处理
+    - 小于 COMPRESS_MIN_SIZE 的响应不压缩，压缩收益不足以抵消开销
+    - 压缩后的 ETag 追加编码后缀（"xxx-br"），不同编码的表示各自拥有强 ETag
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BR_QUALITY', 5)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_MIMETYPES', [
+            'text/html', 'application/json', 'text/markdown', 'text/plain', 'application/xml',
+        ])
+        app.extensions['compress'] = self
+        app.after_request(self._after_request)
+
+    def _after_request(self, resp):
+        if (not current_app.config['COMPRESS_ENABLED']
+                or resp.status_code != 200
+                or resp.direct_passthrough
+                or resp.is_streamed
+                or 'Content-Encoding' in resp.headers
+                or resp.mimetype not in current_app.config['COMPRESS_MIMETYPES']):
+            return resp
+
+        resp.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return resp
+        data = resp.get_data()
+        if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+            return resp
+
+        resp.set_data(compress_bytes(data, encoding))
+        apply_encoding_headers(resp, encoding)
+        return resp
+
+
+def negotiate_encoding() -> str | None:
+    """根据请求的 Accept-Encoding 选择压缩算法，优先 br"""
+    accept = request.accept_encodings
+    if brotli is not None and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    """按配置的压缩级别压缩数据"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=current_app.config['COMPRESS_BR_QUALITY'])
+    return gzip.compress(data, compresslevel=current_app.config['COMPRESS_LEVEL'], mtime=0)
+
+
+def apply_encoding_headers(resp, encoding: str):
+    """设置 Content-Encoding，并为强 ETag 追加编码后缀"""
+    resp.headers['Content-Encoding'] = encoding
+    resp.vary.add('Accept-Encoding')
+    etag, weak = resp.get_etag()
+    if etag and not weak and not etag.endswith(f'-{encoding}'):
+        resp.set_etag(f'{etag}-{encoding}')
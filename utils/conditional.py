@@ -0,0 +1,82 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+
+from flask import request, current_app
+
+from .markdown_helper import RENDERER_VERSION
+
+_site_version = None
+# 当前站点版本（模板、渲染器）开始生效的时间：部署新模板或升级渲染器都需要重启进程，取进程启动时间
+_site_version_since = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def _get_site_version() -> str:
+    """站点版本指纹：模板文件内容 + 渲染器版本
+
+    部署新模板或升级渲染器后 ETag 随之变化，避免客户端拿着旧 ETag 得到 304。
+    各 worker 读取同一份文件，计算结果一致。
+    """
+    global _site_version
+    if _site_version is None:
+        h = hashlib.sha256(RENDERER_VERSION.encode('utf-8'))
+        folder = os.path.join(current_app.root_path, current_app.template_folder or 'templates')
+        for root, _, files in sorted(os.walk(folder)):
+            for name in sorted(files):
+                with open(os.path.join(root, name), 'rb') as f:
+                    h.update(name.encode('utf-8'))
+                    h.update(f.read())
+        _site_version = h.hexdigest()[:16]
+    return _site_version
+
+
+def make_etag(*parts) -> str:
+    """根据给定的组成部分（及站点版本）计算强 ETag"""
+    h = hashlib.sha256(_get_site_version().encode('utf-8'))
+    for part in parts:
+        h.update(b'\0')
+        h.update(str(part).encode('utf-8'))
+    return h.hexdigest()[:32]
+
+
+def _to_http_time(dt: datetime | None) -> datetime | None:
+    """数据库中的时间为 naive UTC，转换为带时区且精确到秒的时间，便于与请求头比较
+
+    页面同时取决于模板与渲染器，而它们的变化不会改变数据库中的时间（渲染缓存写回也不修改 updated_at），
+    因此 Last-Modified 不早于当前站点版本生效的时间，只发送 If-Modified-Since 的客户端在部署后不会得到过期的 304。
+    """
+    if dt is None:
+        return None
+    return max(dt, _site_version_since).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def not_modified(etag: str, last_modified: datetime | None = None, private: bool = False):
+    """检查条件请求头，资源未变化时返回 304 响应，否则返回 None
+
+    If-None-Match 存在时优先生效（RFC 9110），此时忽略 If-Modified-Since。
+    304 会更新缓存中已存响应的头，private 须与完整响应一致，否则共享缓存可能把登录用户的响应当作公开响应。
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+
+    matched = False
+    if request.if_none_match:
+        # 压缩后的响应使用带编码后缀的 ETag（见 utils.compression），同样视为匹配
+        matched = any(request.if_none_match.contains(tag)
+                      for tag in (etag, f'{etag}-br', f'{etag}-gzip'))
+    elif last_modified is not None and request.if_modified_since is not None:
+        matched = _to_http_time(last_modified) <= request.if_modified_since
+
+    if not matched:
+        return None
+    resp = current_app.response_class(status=304)
+    return add_validators(resp, etag, last_modified, private=private)
+
+
+def add_validators(resp, etag: str, last_modified: datetime | None = None, private: bool = False):
+    """为响应附加 ETag / Last-Modified，并要求客户端与代理每次使用前重新验证"""
+    resp.set_etag(etag)
+    if last_modified is not None:
+        resp.last_modified = _to_http_time(last_modified)
+    resp.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    return resp
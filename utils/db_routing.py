@@ -0,0 +1,47 @@
+from flask import g, request, has_request_context
+from flask_sqlalchemy.session import Session
+
+# 只读引擎在 SQLALCHEMY_BINDS 中的键名
+READONLY_BIND = 'readonly'
+
+
+def _use_readonly() -> bool:
+    return has_request_context() and g.get('db_readonly', False)
+
+
+class RoutingSession(Session):
+    """按请求选择引擎的会话
+
+    只读蓝图的请求中，查询走只读引擎；flush（ORM 写入）与 INSERT / UPDATE / DELETE 语句
+    仍走主库，个别需要写入的只读页面不受影响。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _use_readonly() \
+                and not getattr(clause, 'is_dml', False):
+            engine = self._db.engines.get(READONLY_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReadOnlyRouting:
+    """让只读蓝图（DB_READONLY_BLUEPRINTS）的请求使用只读连接
+
+    需配合 SQLAlchemy(session_options={'class_': RoutingSession}) 使用；
+    未配置只读引擎（SQLALCHEMY_BINDS 中没有 readonly）时不生效。
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('DB_READONLY_BLUEPRINTS', ['main', 'blog'])
+        app.extensions['readonly_routing'] = self
+
+        readonly_blueprints = set(app.config['DB_READONLY_BLUEPRINTS'])
+
+        @app.before_request
+        def _select_engine():
+            g.db_readonly = request.blueprint in readonly_blueprints
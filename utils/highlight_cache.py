@@ -0,0 +1,157 @@
+"""代码高亮结果缓存（codehilite / fenced_code 共用）
+
+Pygments 高亮是渲染技术类文章时开销最大的部分，而文章重新渲染或预览时大部分代码块并未变化。
+install() 将 codehilite 模块中的 highlight 替换为带缓存的版本，缓存键为
+(lexer, lexer 选项, formatter, formatter 选项, 代码哈希, Pygments 版本)，输出与直接调用完全一致。
+
+- 内存：进程内 LRU，按字节数限制容量（HIGHLIGHT_CACHE_MAX_BYTES，默认 8MB，0 表示关闭）
+- 磁盘：设置 HIGHLIGHT_CACHE_DIR 后结果同时写入该目录，多个 worker / 渲染进程与重启后均可复用；
+  清空缓存直接删除该目录即可
+
+两项设置在模块加载时从环境变量读取（渲染也会在没有 app 上下文的渲染进程中执行）。
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pygments
+
+HIGHLIGHT_CACHE_MAX_BYTES = int(os.environ.get('HIGHLIGHT_CACHE_MAX_BYTES') or 8 * 1024 * 1024)
+HIGHLIGHT_CACHE_DIR = os.environ.get('HIGHLIGHT_CACHE_DIR') or None
+
+
+class HighlightCache:
+    """按字节数限制容量的 LRU，可选落盘"""
+
+    def __init__(self, max_bytes: int, cache_dir: str | None = None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+        html = self._read_disk(key)
+        if html is not None:
+            self._remember(key, html)
+            with self._lock:
+                self.disk_hits += 1
+            return html
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, html: str):
+        self._remember(key, html)
+        self._write_disk(key, html)
+
+    def clear(self):
+        """清空内存缓存（磁盘缓存不受影响）"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
+
+    def _remember(self, key: str, html: str):
+        size = len(html.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.encode('utf-8'))
+            self._entries[key] = html
+            self._size += size
+            while self._entries and self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.encode('utf-8'))
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.html')
+
+    def _read_disk(self, key: str) -> str | None:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, html: str):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 先写临时文件再原子替换，并发进程不会读到写了一半的文件
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(html)
+            os.replace(tmp, path)
+        except OSError:
+            # 磁盘缓存只是加速手段，写入失败不影响渲染
+            pass
+
+
+highlight_cache = HighlightCache(HIGHLIGHT_CACHE_MAX_BYTES, HIGHLIGHT_CACHE_DIR)
+
+
+def _options_repr(options: dict) -> str:
+    return repr(sorted((k, repr(v)) for k, v in options.items()))
+
+
+def cache_key(code: str, lexer, formatter) -> str:
+    """根据 lexer / formatter 的类型与选项、代码内容计算缓存键"""
+    h = hashlib.sha256()
+    for part in (
+        pygments.__version__,
+        f'{type(lexer).__module__}.{type(lexer).__name__}',
+        _options_repr(getattr(lexer, 'options', {})),
+        f'{type(formatter).__module__}.{type(formatter).__name__}',
+        _options_repr(getattr(formatter, 'options', {})),
+        repr(getattr(formatter, 'lang_str', None)),
+        code,
+    ):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def cached_highlight(code, lexer, formatter, outfile=None):
+    """与 pygments.highlight 签名一致的带缓存版本（outfile 不为空时直接透传）"""
+    if outfile is not None or not highlight_cache.max_bytes and not highlight_cache.cache_dir:
+        return pygments.highlight(code, lexer, formatter, outfile)
+    key = cache_key(code, lexer, formatter)
+    html = highlight_cache.get(key)
+    if html is None:
+        html = pygments.highlight(code, lexer, formatter)
+        highlight_cache.set(key, html)
+    return html
+
+
+def install():
+    """让 codehilite（fenced_code 同样经由 CodeHilite.hilite）使用带缓存的 highlight，重复调用无副作用"""
+    from markdown.extensions import codehilite
+    if getattr(codehilite, 'pygments', None):
+        codehilite.highlight = cached_highlight
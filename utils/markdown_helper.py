@@ -1,11 +1,104 @@
+import hashlib
+import html
+import json
+import math
 import re
+import threading
+import time
+
+# Markdown 扩展配置（render_md 与渲染器池共用）
+MD_EXTENSIONS = [
+    'extra',
+    'tables',
+    'attr_list',
+    'sane_lists',
+    'fenced_code',
+    'codehilite',
+    'toc',
+    'utils.md_images'
+]
+MD_EXTENSION_CONFIGS = {
+    'codehilite': {
+        'guess_lang': False,
+        'noclasses': False
+    }
+}
+
+# 渲染器版本号：修改渲染逻辑（而非扩展配置）时手动递增
+RENDERER_REVISION = 2
+
+
+def _compute_renderer_version() -> str:
+    """根据扩展列表、扩展配置与依赖库版本计算渲染器版本指纹
+
+    任一项变化都会得到新的版本号，已缓存的 rendered_html 随之失效。
+    """
+    parts = {
+        'revision': RENDERER_REVISION,
+        'extensions': MD_EXTENSIONS,
+        'extension_configs': MD_EXTENSION_CONFIGS,
+    }
+    try:
+        import markdown
+        parts['markdown'] = markdown.__version__
+    except Exception:
+        parts['markdown'] = None
+    try:
+        import pygments
+        parts['pygments'] = pygments.__version__
+    except Exception:
+        parts['pygments'] = None
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+RENDERER_VERSION = _compute_renderer_version()
+
+
+def content_hash(*parts: str | None) -> str:
+    """计算渲染输入（标题、正文等）的 SHA-256 摘要"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update((part or '').encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+# 渲染耗时回调：启用运行指标时由 utils.metrics 注册，渲染器本身不依赖指标模块
+_render_observer = None
+
+
+def set_render_observer(fn):
+    """注册渲染耗时回调 fn(seconds)，传入 None 取消"""
+    global _render_observer
+    _render_observer = fn
+
 
 # Markdown 渲染函数
 try:
-    from markdown import markdown as _md_render
+    from markdown import Markdown as _Markdown
 
-    def render_md(text: str) -> str:
-        """渲染 Markdown 文本为 HTML
+    # 每个线程持有一个预先构建好的 Markdown 实例：
+    # 构建实例时加载并配置全部扩展的开销较大，复用实例只需在每次转换前 reset()
+    _md_local = threading.local()
+
+    # 代码高亮结果缓存：未变化的代码块重新渲染时不再调用 Pygments
+    try:
+        from .highlight_cache import install as _install_highlight_cache
+        _install_highlight_cache()
+    except ImportError:
+        pass
+
+    def _get_md() -> _Markdown:
+        """获取当前线程的 Markdown 实例（首次调用时创建）"""
+        md = getattr(_md_local, 'md', None)
+        if md is None:
+            md = _Markdown(extensions=MD_EXTENSIONS, extension_configs=MD_EXTENSION_CONFIGS)
+            _md_local.md = md
+        return md
+
+    def render_md_with_toc(text: str) -> tuple[str, list]:
+        """渲染 Markdown 文本为 HTML，同时返回 toc 扩展生成的标题大纲
 
         启用扩展：
         - extra: 一揽子功能（abbr、attr_list、def_list、fenced_code、footnotes、tables、smarty 等）
@@ -15,51 +108,111 @@ try:
         - fenced_code: 三反引号代码块
         - codehilite: 代码高亮（需要 Pygments）
         - toc: 目录（根据标题生成）
+        - utils.md_images: 图片懒加载、固有尺寸与 WebP 变体替换（见 utils/md_images.py）
+
+        Markdown 实例按线程复用，每次转换前 reset() 清空上一次的状态（脚注、目录、引用链接等），
+        输出与每次新建实例完全一致。
+
+        返回:
+          (html, toc) —— toc 为嵌套列表，每项包含 level、id、name（纯文本）与 children
         """
-        exts = [
-            'extra',
-            'tables',
-            'attr_list',
-            'sane_lists',
-            'fenced_code',
-            'codehilite',
-            'toc'
-        ]
-        return _md_render(
-            text or "",
-            extensions=exts,
-            extension_configs={
-                'codehilite': {
-                    'guess_lang': False,
-                    'noclasses': False
-                }
-            }
-        )
+        md = _get_md()
+        start = time.perf_counter()
+        try:
+            out = md.reset().convert(text or "")
+        except Exception:
+            # 转换中途出错时实例状态不可信，丢弃后向上抛出
+            _md_local.md = None
+            raise
+        if _render_observer is not None:
+            _render_observer(time.perf_counter() - start)
+        return out, _simplify_toc(md.toc_tokens)
+
+    def render_md(text: str) -> str:
+        """渲染 Markdown 文本为 HTML（扩展说明见 render_md_with_toc）"""
+        return render_md_with_toc(text)[0]
 except Exception:
     def render_md(text: str) -> str:
         """降级方案：直接返回预格式化文本"""
         return f"<pre>{(text or '').replace('<','&lt;').replace('>','&gt;')}</pre>"
 
+    def render_md_with_toc(text: str) -> tuple[str, list]:
+        """降级方案：无标题大纲"""
+        return render_md(text), []
 
-def find_title_in_content(content: str, target: str = 'title') -> str | None:
-    """提取 Markdown 首个标题，或返回移除首个标题后的正文。
+
+def _simplify_toc(tokens: list) -> list:
+    """只保留模板需要的字段；toc 扩展给出的 name 已做 HTML 转义，这里还原为纯文本交给模板转义"""
+    return [
+        {
+            'level': t['level'],
+            'id': t['id'],
+            'name': html.unescape(t['name']),
+            'children': _simplify_toc(t['children']),
+        }
+        for t in tokens
+    ]
+
+
+# 阅读速度（每分钟）：中日韩文字按字计，其余按词计
+_CJK_CHAR = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]')
+_LATIN_WORD = re.compile(r"[A-Za-z0-9_]+(?:['’.-][A-Za-z0-9_]+)*")
+_TAG = re.compile(r'<[^>]+>')
+CJK_CHARS_PER_MINUTE = 400
+WORDS_PER_MINUTE = 200
+
+
+def text_stats(rendered_html: str) -> dict:
+    """根据渲染后的 HTML 统计字数、字符数与预计阅读时间（分钟）
+
+    - word_count: 中日韩文字每字计 1，其余文字按单词计
+    - char_count: 去掉标签与空白后的字符数
+    - reading_minutes: 向上取整，有内容时至少 1 分钟
+    """
+    text = html.unescape(_TAG.sub(' ', rendered_html or ''))
+    cjk = len(_CJK_CHAR.findall(text))
+    words = len(_LATIN_WORD.findall(text))
+    word_count = cjk + words
+    minutes = cjk / CJK_CHARS_PER_MINUTE + words / WORDS_PER_MINUTE
+    return {
+        'word_count': word_count,
+        'char_count': sum(1 for c in text if not c.isspace()),
+        'reading_minutes': max(1, math.ceil(minutes)) if word_count else 0,
+    }
+
+
+def analyze_markdown(content: str, db_title: str) -> dict:
+    """一次性完成文章正文的全部解析：定位首个标题、去掉重复标题、渲染、提取大纲与统计
+
+    返回:
+      {
+        'title': Markdown 中的首个标题（未找到为 None）,
+        'body': 去掉重复标题后的正文（与 strip_md_title_if_matches 结果一致）,
+        'html': 渲染后的 HTML,
+        'toc': 标题大纲（见 render_md_with_toc）,
+        'word_count' / 'char_count' / 'reading_minutes': 见 text_stats,
+      }
+    """
+    raw = content or ''
+    lines = raw.splitlines()
+    title, start, end = _locate_title(lines)
+    body = raw
+    if _norm_title(title) == _norm_title(db_title):
+        body = "\n".join(lines[:start] + lines[end:]) if title is not None else raw
+    rendered, toc = render_md_with_toc(body)
+    return {'title': title, 'body': body, 'html': rendered, 'toc': toc, **text_stats(rendered)}
+
+
+def _locate_title(lines: list[str]) -> tuple[str | None, int, int]:
+    """单次扫描定位 Markdown 首个标题
 
     支持两类标题：
     - ATX: 以一个或多个 # 开头的行（例如: # Title）
     - Setext: 标题行下一行全为 '=' 或 '-'（例如: Title\n=====）
 
-    参数:
-      content: 原始 Markdown 文本
-      target: 'title' 返回标题文本；'post' 返回移除首个标题后的正文
-
     返回:
-      - 当 target='title'：返回首个标题文本，未找到则返回 None
-      - 当 target='post' ：返回移除首个标题后的正文；未找到标题则返回原内容
+      (标题文本, 起始行号, 结束行号（不含）)；未找到时返回 (None, -1, -1)
     """
-    if content is None:
-        return None if target == 'title' else ''
-
-    lines = content.splitlines()
     n = len(lines)
 
     def atx_title(s: str) -> str | None:
@@ -79,30 +232,53 @@ def find_title_in_content(content: str, target: str = 'title') -> str | None:
         # 先识别 ATX 标题
         t = atx_title(raw)
         if t:
-            if target == 'title':
-                return t
-            # target == 'post': 删除该行
-            return "\n".join(lines[:i] + lines[i+1:])
+            return t, i, i + 1
 
         # 再尝试识别 Setext 标题（下一行全为 '=' 或 '-'）
         if i + 1 < n:
             title_line = raw.strip()
             underline = lines[i + 1].strip()
             if title_line and (is_all('=', underline) or is_all('-', underline)):
-                if target == 'title':
-                    return title_line
-                # target == 'post': 删除标题行与下划线行
-                return "\n".join(lines[:i] + lines[i+2:])
+                return title_line, i, i + 2
 
     # 未找到任何标题
-    return None if target == 'title' else content
+    return None, -1, -1
+
+
+def _norm_title(s: str | None) -> str:
+    return (s or '').strip().lower()
+
+
+def find_title_in_content(content: str, target: str = 'title') -> str | None:
+    """提取 Markdown 首个标题，或返回移除首个标题后的正文。
+
+    标题识别规则见 _locate_title。
+
+    参数:
+      content: 原始 Markdown 文本
+      target: 'title' 返回标题文本；'post' 返回移除首个标题后的正文
+
+    返回:
+      - 当 target='title'：返回首个标题文本，未找到则返回 None
+      - 当 target='post' ：返回移除首个标题后的正文；未找到标题则返回原内容
+    """
+    if content is None:
+        return None if target == 'title' else ''
+
+    lines = content.splitlines()
+    title, start, end = _locate_title(lines)
+    if target == 'title':
+        return title
+    if title is None:
+        return content
+    return "\n".join(lines[:start] + lines[end:])
 
 
 def strip_md_title_if_matches(content: str, db_title: str) -> str:
     """若 MD 首个标题与数据库标题相同（忽略大小写与前后空白），则返回去掉该标题后的正文，否则返回原内容。"""
     raw = content or ''
-    md_title = find_title_in_content(raw, target='title')
-    norm = lambda s: (s or '').strip().lower()
-    if norm(md_title) == norm(db_title):
-        return find_title_in_content(raw, target='post') or ''
+    lines = raw.splitlines()
+    title, start, end = _locate_title(lines)
+    if _norm_title(title) == _norm_title(db_title):
+        return "\n".join(lines[:start] + lines[end:]) if title is not None else raw
     return raw
@@ -0,0 +1,136 @@
+"""编辑器增量预览：按顶层块切分 Markdown，只渲染内容发生变化的块
+
+编辑长文时每次预览都整篇重新渲染（含全部代码高亮）代价很高。这里把草稿切分为顶层块
+（段落、标题、列表、代码块、表格等），每块以内容哈希标识：
+- 服务端按哈希缓存块的渲染结果，未变化的块不再渲染
+- 客户端提交已持有的块哈希（known），响应只包含客户端缺少的块 HTML，
+  客户端按 blocks 给出的顺序拼装即可得到完整预览
+
+跨块生效的语法：引用式链接的定义会附加到每个块后一同渲染；含脚注的文档无法逐块渲染，整篇作为一个块。
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from .markdown_helper import render_md, strip_md_title_if_matches, content_hash, RENDERER_VERSION
+
+_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_LIST_ITEM = re.compile(r'^ {0,3}(?:[*+-]|\d+[.)])\s')
+_INDENTED = re.compile(r'^(?: {4}|\t)')
+_REF_DEF = re.compile(r'^ {0,3}\[[^\]^][^\]]*\]:\s*\S')
+_FOOTNOTE = re.compile(r'\[\^[^\]]+\]')
+
+BLOCK_CACHE_MAX_ENTRIES = 4096
+
+
+class _BlockCache:
+    """块哈希 -> 渲染结果的 LRU（按条目数限制容量）"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def set(self, key: str, html: str):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_block_cache = _BlockCache(BLOCK_CACHE_MAX_ENTRIES)
+
+
+def split_blocks(text: str) -> list[str]:
+    """将 Markdown 切分为顶层块
+
+    空行分隔块，但以下情况不切分：
+    - 围栏代码块内部的空行
+    - 空行后是缩进行（列表项的后续段落、缩进代码块）
+    - 列表中以空行分隔的下一个列表项（保持松散列表为同一个列表）
+    """
+    blocks = []
+    cur = []
+    fence = None
+    pending_blank = False
+
+    def flush():
+        while cur and not cur[-1].strip():
+            cur.pop()
+        if cur:
+            blocks.append("\n".join(cur))
+        cur.clear()
+
+    for line in (text or '').splitlines():
+        if fence is not None:
+            cur.append(line)
+            m = _FENCE.match(line)
+            if m and m.group(1)[0] == fence[0] and len(m.group(1)) >= len(fence) \
+                    and not line.strip()[len(m.group(1)):].strip():
+                fence = None
+            continue
+
+        if not line.strip():
+            if cur:
+                cur.append(line)
+                pending_blank = True
+            continue
+
+        if pending_blank:
+            continues = _INDENTED.match(line) or (_LIST_ITEM.match(cur[0]) and _LIST_ITEM.match(line))
+            if not continues:
+                flush()
+            pending_blank = False
+
+        m = _FENCE.match(line)
+        if m:
+            fence = m.group(1)
+        cur.append(line)
+
+    flush()
+    return blocks
+
+
+def render_blocks(text: str, title: str = '', known: set[str] | frozenset = frozenset()) -> dict:
+    """增量渲染草稿
+
+    参数:
+      text: 草稿全文
+      title: 文章标题，正文首个标题与之相同时去掉（与正式渲染一致）
+      known: 客户端已持有 HTML 的块哈希
+
+    返回:
+      {
+        'blocks': 按顺序排列的块哈希,
+        'html': {块哈希: HTML}（只包含不在 known 中的块）,
+        'rendered': 本次实际渲染（未命中缓存）的块数,
+      }
+    """
+    body = strip_md_title_if_matches(text or '', title) if title else (text or '')
+    blocks = [body] if _FOOTNOTE.search(body) else split_blocks(body)
+
+    # 引用式链接的定义可能位于其他块中，附加到每个块后渲染（定义本身不产生输出）
+    refs = "\n".join(line for line in body.splitlines() if _REF_DEF.match(line))
+    suffix = "\n\n" + refs if refs else ""
+
+    order, html, rendered = [], {}, 0
+    for block in blocks:
+        key = content_hash(RENDERER_VERSION, block, refs)[:20]
+        order.append(key)
+        if key in known or key in html:
+            continue
+        fragment = _block_cache.get(key)
+        if fragment is None:
+            fragment = render_md(block + suffix)
+            _block_cache.set(key, fragment)
+            rendered += 1
+        html[key] = fragment
+    return {'blocks': order, 'html': html, 'rendered': rendered}
@@ -0,0 +1,162 @@
+"""Markdown 图片后处理扩展：懒加载、固有尺寸与 WebP 变体替换
+
+在 render_md 的扩展列表中以 'utils.md_images' 启用，对渲染出的每个 <img>：
+- 添加 loading="lazy" 与 decoding="async"（已显式指定的属性保持不变）
+- 对站内图片（/static/ 下的本地文件）读取固有尺寸写入 width / height，浏览器可提前预留版面
+- 若存在 scripts/compress_image.py 生成的优化版本，改用 WebP 并附带 srcset；
+  否则若同目录下存在同名 .webp 文件，直接替换为该文件
+
+图片尺寸与变体清单按文件 mtime 缓存，文件更新后自动重新读取。
+新增或替换图片后，需执行 flask posts render --force 刷新已缓存的文章 HTML。
+"""
+import json
+import os
+import posixpath
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, unquote
+
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+
+basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 站内图片的 URL 前缀与对应的本地目录
+STATIC_URL_PATH = '/static/'
+STATIC_DIR = os.path.join(basedir, 'static')
+# compress_image.py 的源目录与输出目录（相对 STATIC_DIR）：
+#   python scripts/compress_image.py --src static/images --out static/images/optimized
+OPTIMIZED_SOURCE = 'images'
+OPTIMIZED_OUTPUT = 'images/optimized'
+
+_DIMENSIONS_CACHE_SIZE = 2048
+
+
+class _FileCache:
+    """以 (路径, mtime, 大小) 为键的小型 LRU 缓存，文件变化后旧结果自然失效"""
+
+    def __init__(self, loader, maxsize: int):
+        self._loader = loader
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, path: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = self._loader(path)
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _read_dimensions(path: str) -> tuple[int, int] | None:
+    """读取图片宽高（Pillow 只解析文件头，不解码像素）"""
+    try:
+        from PIL import Image
+        with Image.open(path) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def _read_manifest(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('images', {})
+    except (OSError, ValueError):
+        return {}
+
+
+_dimensions = _FileCache(_read_dimensions, _DIMENSIONS_CACHE_SIZE)
+_manifests = _FileCache(_read_manifest, 8)
+
+
+def get_image_size(path: str) -> tuple[int, int] | None:
+    """获取本地图片的宽高（带缓存），文件不存在或无法解析时返回 None"""
+    return _dimensions.get(path)
+
+
+def _local_path(src: str) -> str | None:
+    """将站内图片 URL 转换为本地路径（相对 STATIC_DIR），外部链接或越界路径返回 None"""
+    parts = urlsplit(src)
+    if parts.scheme or parts.netloc or not parts.path.startswith(STATIC_URL_PATH):
+        return None
+    rel = posixpath.normpath(unquote(parts.path[len(STATIC_URL_PATH):]))
+    if rel.startswith('..') or rel.startswith('/'):
+        return None
+    return rel
+
+
+def _optimized_variants(rel: str) -> list[dict] | None:
+    """在 compress_image.py 的清单中查找图片的 WebP 变体（按宽度升序）"""
+    prefix = OPTIMIZED_SOURCE + '/'
+    if not rel.startswith(prefix):
+        return None
+    manifest = _manifests.get(os.path.join(STATIC_DIR, OPTIMIZED_OUTPUT, 'manifest.json'))
+    entry = (manifest or {}).get(rel[len(prefix):])
+    if not entry:
+        return None
+    variants = entry.get('variants', {}).get('webp')
+    return sorted(variants, key=lambda v: v['width']) if variants else None
+
+
+def _static_url(rel: str) -> str:
+    return STATIC_URL_PATH + rel
+
+
+class ImageTreeprocessor(Treeprocessor):
+    """为 <img> 添加懒加载、尺寸属性，并替换为 WebP 变体"""
+
+    def run(self, root):
+        for img in root.iter('img'):
+            img.attrib.setdefault('loading', 'lazy')
+            img.attrib.setdefault('decoding', 'async')
+
+            rel = _local_path(img.get('src', ''))
+            if rel is None or rel.lower().endswith('.svg'):
+                continue
+
+            size = None
+            variants = _optimized_variants(rel)
+            if variants:
+                largest = variants[-1]
+                img.set('src', _static_url(f"{OPTIMIZED_OUTPUT}/{largest['path']}"))
+                if len(variants) > 1 and 'srcset' not in img.attrib:
+                    img.set('srcset', ', '.join(
+                        f"{_static_url(OPTIMIZED_OUTPUT + '/' + v['path'])} {v['width']}w" for v in variants))
+                size = (largest['width'], largest['height'])
+            elif not rel.lower().endswith('.webp'):
+                webp = os.path.splitext(rel)[0] + '.webp'
+                if os.path.isfile(os.path.join(STATIC_DIR, webp)):
+                    img.set('src', _static_url(webp))
+
+            if size is None:
+                size = get_image_size(os.path.join(STATIC_DIR, rel))
+            # 只补全缺失的尺寸；作者手动指定了其一时不覆盖，避免破坏比例
+            if size and 'width' not in img.attrib and 'height' not in img.attrib:
+                img.set('width', str(size[0]))
+                img.set('height', str(size[1]))
+
+
+class ImageExtension(Extension):
+    def extendMarkdown(self, md):
+        # 优先级低于 inline(20) 与 prettify(10)：此时图片节点已全部生成
+        md.treeprocessors.register(ImageTreeprocessor(md), 'image_attrs', 5)
+
+
+def makeExtension(**kwargs):
+    return ImageExtension(**kwargs)
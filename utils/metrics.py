@@ -0,0 +1,467 @@
+"""运行指标：请求耗时、Markdown 渲染、缓存命中与数据库查询，以 Prometheus 文本格式导出
+
+每个进程在内存中累计自己的指标；配置 METRICS_DIR 后，各进程定期把快照写入该目录下
+各自的文件（<pid>-<随机后缀>.json），/metrics 读取目录中的全部快照合并输出，
+因此无论请求落在哪个 gunicorn worker 上，看到的都是全部 worker 的汇总：
+- 计数器与直方图：全部快照相加（已退出 worker 的快照保留，重启 worker 后总数不会回退）
+- 仪表（当前值，如缓存占用）：只合并仍在运行的进程
+
+未配置 METRICS_DIR 时只导出当前进程的指标（开发服务器单进程即可）。
+METRICS_DIR 应在服务启动前清空（docker/entrypoint.sh 已处理）。
+"""
+import atexit
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from flask import request, g, session, current_app, has_request_context
+
+from . import query_events
+
+# 请求耗时与数据库耗时的桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Markdown 渲染耗时的桶（秒），编辑器逐块预览时单次渲染通常在毫秒级
+RENDER_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# 每个请求的查询条数
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, registry, name: str, help: str, labels: tuple = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        registry.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+
+class Counter(_Metric):
+    """只增的计数器"""
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        self.registry.add(self, self._key(labels), amount)
+
+    def set_total(self, value: float, **labels):
+        """同步外部维护的累计值（如高亮缓存的命中次数），只用于采集函数"""
+        self.registry.put(self, self._key(labels), value)
+
+
+class Gauge(_Metric):
+    """当前值（如缓存占用）；合并时只计入仍在运行的进程"""
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        self.registry.put(self, self._key(labels), value)
+
+
+class Histogram(_Metric):
+    """直方图：按桶计数，并记录总和与次数"""
+    type = 'histogram'
+
+    def __init__(self, registry, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(registry, name, help, labels)
+
+    def observe(self, value: float, **labels):
+        self.registry.observe(self, self._key(labels), value)
+
+
+class Registry:
+    """当前进程的指标值
+
+    值的存放形式：计数器与仪表为数字；直方图为列表，前 len(buckets)+1 项为各桶（含 +Inf）
+    的非累计计数，最后一项为观测值总和。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._values = {}
+        self._collectors = []
+        self.dirty = False
+        # fork 出的子进程（如渲染进程池）不继承父进程已累计的值，避免重复计数
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self.dirty = False
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f'指标重复注册: {metric.name}')
+        self._metrics[metric.name] = metric
+
+    def add_collector(self, fn):
+        """注册采集函数：导出或写快照前调用，用于同步外部统计（如缓存命中次数）"""
+        self._collectors.append(fn)
+
+    def add(self, metric, key: tuple, amount: float):
+        with self._lock:
+            k = (metric.name, key)
+            self._values[k] = self._values.get(k, 0) + amount
+            self.dirty = True
+
+    def put(self, metric, key: tuple, value: float):
+        with self._lock:
+            self._values[(metric.name, key)] = value
+            self.dirty = True
+
+    def observe(self, metric: Histogram, key: tuple, value: float):
+        # 找到第一个上界不小于观测值的桶，超出全部上界时计入 +Inf
+        index = len(metric.buckets)
+        for i, bound in enumerate(metric.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            k = (metric.name, key)
+            counts = self._values.get(k)
+            if counts is None:
+                counts = self._values[k] = [0] * (len(metric.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+            self.dirty = True
+
+    def snapshot(self) -> dict:
+        """返回 {指标名: {标签值元组: 值}}，值为副本"""
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception:
+                # 采集外部统计失败不影响其余指标
+                pass
+        with self._lock:
+            result = {}
+            for (name, key), value in self._values.items():
+                result.setdefault(name, {})[key] = list(value) if isinstance(value, list) else value
+            self.dirty = False
+            return result
+
+    # ---------------
+    # 合并与导出
+    # ---------------
+
+    def merge(self, snapshots: list[tuple[dict, bool]]) -> dict:
+        """合并多个进程的快照；snapshots 为 (快照, 进程是否存活) 列表"""
+        merged = {}
+        for snap, alive in snapshots:
+            for name, series in snap.items():
+                metric = self._metrics.get(name)
+                if metric is None or (metric.type == 'gauge' and not alive):
+                    continue
+                target = merged.setdefault(name, {})
+                for key, value in series.items():
+                    key = tuple(key)
+                    if metric.type == 'histogram':
+                        if len(value) != len(metric.buckets) + 2:
+                            # 桶定义已变化的旧快照无法合并
+                            continue
+                        old = target.get(key)
+                        target[key] = value if old is None else [a + b for a, b in zip(old, value)]
+                    else:
+                        target[key] = target.get(key, 0) + value
+        return merged
+
+    def exposition(self, merged: dict) -> str:
+        """按 Prometheus 文本格式（0.0.4）输出"""
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f'# HELP {name} {_escape_help(metric.help)}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for key, value in sorted(merged.get(name, {}).items()):
+                labels = list(zip(metric.labels, key))
+                if metric.type != 'histogram':
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), value[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f'{name}_bucket{_labels(labels + [("le", le)])} {_number(cumulative)}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(value[-1])}')
+                lines.append(f'{name}_count{_labels(labels)} {_number(cumulative)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _labels(pairs: list) -> str:
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    )
+    return '{' + body + '}'
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+# ---------------
+# 全局注册表与指标定义
+# ---------------
+
+registry = Registry()
+
+http_requests = Counter(
+    registry, 'http_requests_total', '请求数（按端点、蓝图、方法与状态码）',
+    ('endpoint', 'blueprint', 'method', 'status'))
+http_request_duration = Histogram(
+    registry, 'http_request_duration_seconds', '请求处理耗时（秒，含压缩等 after_request 处理）',
+    ('endpoint', 'blueprint', 'method'))
+http_request_db_queries = Histogram(
+    registry, 'http_request_db_queries', '每个请求执行的 SQL 语句数',
+    ('endpoint', 'blueprint'), buckets=QUERY_COUNT_BUCKETS)
+http_request_db_duration = Histogram(
+    registry, 'http_request_db_duration_seconds', '每个请求的 SQL 执行总耗时（秒）',
+    ('endpoint', 'blueprint'))
+render_md_duration = Histogram(
+    registry, 'render_md_duration_seconds', 'Markdown 渲染耗时（秒），_count 为渲染次数',
+    buckets=RENDER_BUCKETS)
+post_render_cache = Counter(
+    registry, 'post_render_cache_total', '文章详情页渲染缓存命中（hit）与重新渲染（miss）次数',
+    ('result',))
+page_cache_requests = Counter(
+    registry, 'page_cache_requests_total', '公开页面响应缓存命中（HIT）与未命中（MISS）次数',
+    ('result',))
+highlight_cache_lookups = Counter(
+    registry, 'highlight_cache_lookups_total', '代码高亮缓存查询次数（memory / disk 命中，miss 未命中）',
+    ('result',))
+highlight_cache_entries = Gauge(registry, 'highlight_cache_entries', '代码高亮内存缓存条目数')
+highlight_cache_bytes = Gauge(registry, 'highlight_cache_bytes', '代码高亮内存缓存占用字节数')
+
+
+def _collect_highlight_cache():
+    from .highlight_cache import highlight_cache
+
+    stats = highlight_cache.stats()
+    highlight_cache_lookups.set_total(stats['hits'], result='memory')
+    highlight_cache_lookups.set_total(stats['disk_hits'], result='disk')
+    highlight_cache_lookups.set_total(stats['misses'], result='miss')
+    highlight_cache_entries.set(stats['entries'])
+    highlight_cache_bytes.set(stats['bytes'])
+
+
+registry.add_collector(_collect_highlight_cache)
+
+
+# ---------------
+# 多进程快照
+# ---------------
+
+class SnapshotStore:
+    """METRICS_DIR 中的进程快照文件"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._path = None
+        self._pid = None
+
+    def _own_path(self) -> str:
+        # 文件名带随机后缀：pid 被新进程复用时不会覆盖旧进程的快照
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._path = os.path.join(self.directory, f'{self._pid}-{uuid.uuid4().hex[:8]}.json')
+        return self._path
+
+    def write(self, snap: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        data = {
+            'pid': os.getpid(),
+            'metrics': {name: [[list(k), v] for k, v in series.items()] for name, series in snap.items()},
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, self._own_path())
+
+    def read_all(self) -> list[tuple[dict, bool]]:
+        result = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return result
+        for filename in names:
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snap = {name: {tuple(k): v for k, v in series} for name, series in data['metrics'].items()}
+            result.append((snap, _pid_alive(data['pid'])))
+        return result
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ---------------
+# Flask 扩展
+# ---------------
+
+class Metrics:
+    """请求级指标采集与 /metrics 导出
+
+    - 请求耗时与状态码：按端点（路由的 endpoint 名）与蓝图统计，未匹配路由的请求记为 <unmatched>
+    - 数据库：每个请求执行的 SQL 条数与耗时（监听全部引擎的 cursor 执行事件）
+    - 渲染：render_md 耗时与次数、文章详情页渲染缓存命中、公开页面缓存命中、代码高亮缓存统计
+    - /metrics：登录后台后可访问；配置 METRICS_TOKEN 后，抓取端也可使用 Authorization: Bearer <token>
+
+    需在 db.init_app(app) 之后、其他注册请求钩子的扩展之前初始化，耗时才能覆盖它们的处理。
+    """
+
+    def __init__(self, app=None, db=None):
+        self.store = None
+        self._interval = 5.0
+        self._thread = None
+        self._pid = None
+        self._thread_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_DIR', '')
+        app.config.setdefault('METRICS_SYNC_INTERVAL', 5.0)
+        app.config.setdefault('METRICS_TOKEN', '')
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        if app.config['METRICS_DIR']:
+            self.store = SnapshotStore(app.config['METRICS_DIR'])
+            self._interval = float(app.config['METRICS_SYNC_INTERVAL'])
+            atexit.register(self._write_snapshot)
+
+        with app.app_context():
+            for engine in db.engines.values():
+                query_events.install(engine)
+        query_events.subscribe(_record_request_query)
+
+        from .markdown_helper import set_render_observer
+        set_render_observer(render_md_duration.observe)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', endpoint='metrics', view_func=self._metrics_view)
+
+    # ---------------
+    # 请求钩子
+    # ---------------
+
+    def _before_request(self):
+        g._metrics_start = time.perf_counter()
+
+    def _after_request(self, resp):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return resp
+        endpoint = request.endpoint or '<unmatched>'
+        blueprint = request.blueprint or ''
+        http_requests.inc(endpoint=endpoint, blueprint=blueprint, method=request.method,
+                          status=resp.status_code)
+        http_request_duration.observe(time.perf_counter() - start,
+                                      endpoint=endpoint, blueprint=blueprint, method=request.method)
+        http_request_db_queries.observe(g.get('_metrics_db_queries', 0), endpoint=endpoint, blueprint=blueprint)
+        http_request_db_duration.observe(g.get('_metrics_db_seconds', 0.0), endpoint=endpoint, blueprint=blueprint)
+        page_cache_status = resp.headers.get('X-Page-Cache')
+        if page_cache_status:
+            page_cache_requests.inc(result=page_cache_status)
+        self._ensure_thread()
+        return resp
+
+    # ---------------
+    # 快照同步
+    # ---------------
+
+    def _ensure_thread(self):
+        # gunicorn worker 是 fork 出的进程，线程按进程懒启动
+        if self.store is None or (self._pid == os.getpid() and self._thread.is_alive()):
+            return
+        with self._thread_lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._sync_loop, name='metrics-sync', daemon=True)
+            self._thread.start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self._interval)
+            if registry.dirty:
+                self._write_snapshot()
+
+    def _write_snapshot(self):
+        if self.store is None:
+            return
+        try:
+            self.store.write(registry.snapshot())
+        except OSError:
+            # 快照只用于汇总展示，写入失败时等待下次同步
+            pass
+
+    # ---------------
+    # 导出
+    # ---------------
+
+    def _authorized(self) -> bool:
+        if session.get('logged_in'):
+            return True
+        token = current_app.config['METRICS_TOKEN']
+        auth = request.headers.get('Authorization', '')
+        return bool(token) and auth.startswith('Bearer ') \
+            and hmac.compare_digest(auth[len('Bearer '):].encode(), token.encode())
+
+    def _metrics_view(self):
+        if not self._authorized():
+            resp = current_app.response_class('unauthorized\n', status=401, mimetype='text/plain')
+            resp.headers['WWW-Authenticate'] = 'Bearer realm="metrics"'
+            return resp
+
+        if self.store is not None:
+            # 先写入本进程的最新快照，再汇总全部进程
+            self._write_snapshot()
+            snapshots = self.store.read_all()
+        else:
+            snapshots = [(registry.snapshot(), True)]
+        body = registry.exposition(registry.merge(snapshots))
+        resp = current_app.response_class(body, content_type=CONTENT_TYPE)
+        resp.headers['Cache-Control'] = 'no-store'
+        return resp
+
+
+def _record_request_query(statement: str, elapsed: float, executemany: bool):
+    """统计请求内执行的 SQL 条数与耗时（请求上下文之外的执行，如后台写回，不计入）"""
+    if has_request_context():
+        g._metrics_db_queries = g.get('_metrics_db_queries', 0) + 1
+        g._metrics_db_seconds = g.get('_metrics_db_seconds', 0.0) + elapsed
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, session, make_response, current_app
+
+from utils.compression import negotiate_encoding, compress_bytes, apply_encoding_headers
+
+
+class PageCache:
+    """进程内的公开页面响应缓存（LRU，按条目数与字节数限制容量）
+
+    - 只缓存未登录访客的 GET/HEAD 200 响应，登录用户（可见隐藏文章）直接绕过
+    - 失效依赖数据库中的内容版本号（SiteState），任一 worker 写入文章后，
+      其他 worker 在下次检查版本号时清空自己的缓存
+    - 压缩后的正文（br / gzip）按需生成后与条目一同保存，命中时直接复用，
+      同一篇文章不会在每次命中时重复压缩；压缩副本同样计入字节数上限
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self._generation = None
+        self._checked_at = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PAGE_CACHE_ENABLED', True)
+        app.config.setdefault('PAGE_CACHE_MAX_ENTRIES', 512)
+        app.config.setdefault('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+        app.config.setdefault('PAGE_CACHE_CHECK_INTERVAL', 0)
+        app.extensions['page_cache'] = self
+
+    # ---------------
+    # 缓存存取
+    # ---------------
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _sync_generation(self) -> int:
+        """与数据库中的内容版本号同步，版本变化时清空缓存；返回当前版本号"""
+        from models import SiteState
+
+        interval = current_app.config['PAGE_CACHE_CHECK_INTERVAL']
+        now = time.monotonic()
+        if self._generation is not None and interval and now - self._checked_at < interval:
+            return self._generation
+
+        generation = SiteState.get_generation()
+        with self._lock:
+            if generation != self._generation:
+                self._entries.clear()
+                self._size = 0
+                self._generation = generation
+            self._checked_at = now
+        return generation
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key, entry, generation: int):
+        max_entries = current_app.config['PAGE_CACHE_MAX_ENTRIES']
+        max_bytes = current_app.config['PAGE_CACHE_MAX_BYTES']
+        size = len(entry['body'])
+        if size > max_bytes:
+            return
+        with self._lock:
+            # 渲染期间内容版本已变化，结果可能基于旧数据，不写入
+            if generation != self._generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= _entry_size(old)
+            self._entries[key] = entry
+            self._size += size
+            while self._entries and (len(self._entries) > max_entries or self._size > max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= _entry_size(evicted)
+
+    def _encoded_body(self, key, entry, encoding: str) -> bytes | None:
+        """取条目的压缩副本，不存在时压缩并保存；不满足压缩条件时返回 None"""
+        body = entry['variants'].get(encoding)
+        if body is not None:
+            return body
+        config = current_app.config
+        if (not config['COMPRESS_ENABLED']
+                or entry['mimetype'] not in config['COMPRESS_MIMETYPES']
+                or len(entry['body']) < config['COMPRESS_MIN_SIZE']):
+            return None
+
+        body = compress_bytes(entry['body'], encoding)
+        with self._lock:
+            # 条目仍在缓存中才保存副本，已被淘汰或失效的条目只用于本次响应
+            if self._entries.get(key) is entry and encoding not in entry['variants']:
+                entry['variants'][encoding] = body
+                self._size += len(body)
+        return body
+
+    # ---------------
+    # 视图装饰器
+    # ---------------
+
+    def cached(self, f):
+        """缓存公开页面的视图装饰器"""
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if (not current_app.config['PAGE_CACHE_ENABLED']
+                    or request.method not in ('GET', 'HEAD')
+                    or session.get('logged_in')):
+                return f(*args, **kwargs)
+
+            key = request.full_path
+            generation = self._sync_generation()
+            entry = self._get(key)
+            if entry is not None:
+                encoding = negotiate_encoding()
+                body = self._encoded_body(key, entry, encoding) if encoding else None
+                resp = current_app.response_class(body or entry['body'], status=entry['status'],
+                                                  content_type=entry['content_type'])
+                resp.headers.extend(entry['headers'])
+                if body is not None:
+                    apply_encoding_headers(resp, encoding)
+                resp.headers['X-Page-Cache'] = 'HIT'
+                # 缓存的响应带有 ETag / Last-Modified，命中时同样支持条件请求
+                return resp.make_conditional(request)
+
+            resp = make_response(f(*args, **kwargs))
+            if resp.status_code == 200 and not resp.direct_passthrough:
+                entry = {
+                    'body': resp.get_data(),
+                    'status': resp.status_code,
+                    'mimetype': resp.mimetype,
+                    'content_type': resp.content_type,
+                    'variants': {},
+                    'headers': [(k, v) for k, v in resp.headers
+                                if k.lower() not in ('set-cookie', 'content-length', 'content-type')],
+                }
+                self._set(key, entry, generation)
+                # 首次请求即生成压缩副本，后续命中直接复用（after_request 不再重复压缩）
+                encoding = negotiate_encoding()
+                body = self._encoded_body(key, entry, encoding) if encoding else None
+                if body is not None:
+                    resp.set_data(body)
+                    apply_encoding_headers(resp, encoding)
+            resp.headers['X-Page-Cache'] = 'MISS'
+            return resp
+        return decorated_function
+
+
+def _entry_size(entry) -> int:
+    """条目占用的字节数（原文与全部压缩副本）"""
+    return len(entry['body']) + sum(len(b) for b in entry['variants'].values())
@@ -0,0 +1,37 @@
+"""SQL 语句执行事件：每个引擎只注册一对 cursor 执行监听，计时一次后分发给各订阅者
+
+运行指标（utils/metrics.py）与 SQL 剖析（utils/sql_profiler.py）都需要每条语句的耗时，
+共用这里的计时，热路径上每条语句只计时一次。
+"""
+import time
+
+from sqlalchemy import event
+
+_subscribers = []
+
+
+def subscribe(fn):
+    """订阅语句执行完成事件：fn(statement, elapsed, executemany)，elapsed 为秒；重复订阅同一函数只保留一个"""
+    if fn not in _subscribers:
+        _subscribers.append(fn)
+
+
+def install(engine):
+    """为引擎注册计时监听（重复调用不会重复注册）"""
+    if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    for fn in _subscribers:
+        fn(statement, elapsed, executemany)
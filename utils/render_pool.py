@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _render_one(item):
+    """在子进程中渲染单篇文章（复用 Post.render_content，不触碰数据库）
+
+    参数:
+      item: (key, title, content)，key 原样返回，供调用方对应结果
+    """
+    from models import Post
+
+    key, title, content = item
+    p = Post(title=title, content=content)
+    p.render_content()
+    return key, {name: getattr(p, name) for name in Post.RENDER_FIELDS}
+
+
+class RenderPool:
+    """多进程 Markdown 渲染池，将 Markdown 解析与 Pygments 高亮分摊到多个 CPU 核心
+
+    workers 为 1 时在当前进程内顺序渲染，便于调试。
+
+    用法:
+        with RenderPool(workers) as pool:
+            for key, fields in pool.render(items):
+                ...
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def render(self, items: list) -> list:
+        """渲染一批 (key, title, content)，返回 [(key, 渲染结果字段), ...]，顺序与输入一致"""
+        if self._executor is None:
+            return [_render_one(item) for item in items]
+        chunksize = max(1, len(items) // (self.workers * 4))
+        return list(self._executor.map(_render_one, items, chunksize=chunksize))
@@ -0,0 +1,192 @@
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import update, bindparam
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.attributes import set_committed_value
+
+
+class _Flight:
+    """一次进行中的渲染，同一篇文章的并发请求等待同一个结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.fields = None
+        self.error = None
+
+
+class RenderWriter:
+    """文章渲染缓存的回填：请求内直接使用新渲染结果，写回数据库交给后台线程
+
+    - 单飞（single-flight）：同一篇文章（按 id、内容摘要与渲染器版本区分）同时只渲染一次，
+      并发的其他请求等待并复用该结果；最近的渲染结果在进程内短暂保留，写回完成前到达的请求也不再重复渲染
+    - 后台写入：待写回的结果按文章 id 去重（只保留最新一次），攒批后在后台线程中一次提交，
+      访客的 GET 请求不再产生数据库写入
+    - 写回条件：文章的 updated_at 与渲染时一致，渲染期间文章被编辑时放弃写回，避免旧结果覆盖新内容
+
+    写回不修改 updated_at，也不递增内容版本号：渲染结果只是正文的派生数据，
+    请求中使用的 ETag 已按新的渲染缓存键计算，写回后与数据库状态一致。
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flights = {}
+        self._recent = OrderedDict()
+        self._pending = {}
+        self._thread = None
+        self._pid = None
+        self._app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RENDER_WRITER_ENABLED', True)
+        # 攒批等待时间（秒）与每批最多写回的文章数
+        app.config.setdefault('RENDER_WRITER_DELAY', 0.5)
+        app.config.setdefault('RENDER_WRITER_BATCH_SIZE', 100)
+        app.config.setdefault('RENDER_WRITER_RECENT_SIZE', 256)
+        app.extensions['render_writer'] = self
+        self._app = app
+        # 进程退出前写回尚未提交的结果（例如 flask site build 结束时）
+        atexit.register(self.flush)
+
+    # ---------------
+    # 请求内使用
+    # ---------------
+
+    def fill(self, post):
+        """为渲染缓存缺失或过期的文章填充渲染结果（不标记为已修改，不会被 flush），并安排后台写回"""
+        from utils.markdown_helper import RENDERER_VERSION
+
+        key = (post.id, post.compute_content_hash(), RENDERER_VERSION)
+        fields = self._render_once(key, post.title, post.content)
+        for name, value in fields.items():
+            set_committed_value(post, name, value)
+
+        if current_app.config['RENDER_WRITER_ENABLED']:
+            self._enqueue(post.id, post.updated_at, fields)
+        else:
+            self._write({post.id: (post.updated_at, fields)})
+
+    def _render_once(self, key, title: str, content: str) -> dict:
+        with self._lock:
+            fields = self._recent.get(key)
+            if fields is not None:
+                self._recent.move_to_end(key)
+                return fields
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.fields
+
+        try:
+            flight.fields = _render_fields(title, content)
+            return flight.fields
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                if flight.fields is not None:
+                    self._recent[key] = flight.fields
+                    while len(self._recent) > current_app.config['RENDER_WRITER_RECENT_SIZE']:
+                        self._recent.popitem(last=False)
+            flight.event.set()
+
+    # ---------------
+    # 后台写回
+    # ---------------
+
+    def _enqueue(self, post_id: int, seen_updated_at, fields: dict):
+        with self._lock:
+            self._pending[post_id] = (seen_updated_at, fields)
+            self._ensure_thread()
+            self._wakeup.notify()
+
+    def _ensure_thread(self):
+        # gunicorn 在创建应用后 fork worker，线程不会被继承，按进程懒启动
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='render-writer', daemon=True)
+        self._thread.start()
+
+    def _take_batch(self) -> dict:
+        batch_size = self._app.config['RENDER_WRITER_BATCH_SIZE']
+        batch = {}
+        for post_id in list(self._pending)[:batch_size]:
+            batch[post_id] = self._pending.pop(post_id)
+        return batch
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wakeup.wait()
+            # 等待一小段时间，让同一时段的多篇文章合并为一次提交
+            time.sleep(self._app.config['RENDER_WRITER_DELAY'])
+            with self._lock:
+                batch = self._take_batch()
+            if batch:
+                with self._app.app_context():
+                    self._write(batch)
+
+    def flush(self):
+        """立即写回全部待写结果（进程退出、命令行结束时调用）"""
+        if self._app is None:
+            return
+        while True:
+            with self._lock:
+                batch = self._take_batch()
+            if not batch:
+                return
+            with self._app.app_context():
+                self._write(batch)
+
+    def _write(self, batch: dict):
+        """按主键批量写回；updated_at 已变化（渲染期间文章被编辑）的行不更新"""
+        from extensions import db
+        from models import Post
+
+        values = {name: bindparam(f'v_{name}') for name in Post.RENDER_FIELDS}
+        # 显式写回原值，避免触发 updated_at 的 onupdate
+        values['updated_at'] = bindparam('seen_updated_at')
+        stmt = (
+            update(Post.__table__)
+            .where(Post.id == bindparam('post_id'))
+            .where(Post.updated_at.is_not_distinct_from(bindparam('seen_updated_at')))
+            .values(values)
+        )
+        rows = [
+            {'post_id': post_id, 'seen_updated_at': seen,
+             **{f'v_{name}': value for name, value in fields.items()}}
+            for post_id, (seen, fields) in batch.items()
+        ]
+        try:
+            # 使用独立连接写入主库，不影响（同步写回时）请求自身的会话
+            with db.engine.begin() as conn:
+                conn.execute(stmt, rows)
+        except SQLAlchemyError:
+            # 写回只是缓存，失败时放弃，下次访问会重新渲染
+            current_app.logger.exception('渲染缓存写回失败（%d 篇）', len(rows))
+
+
+def _render_fields(title: str, content: str) -> dict:
+    """在临时对象上渲染，返回 Post.RENDER_FIELDS 对应的字段值"""
+    from models import Post
+
+    p = Post(title=title, content=content)
+    p.render_content()
+    return {name: getattr(p, name) for name in Post.RENDER_FIELDS}
@@ -0,0 +1,81 @@
+import re
+
+from markupsafe import Markup, escape
+
+# 中日韩文字范围：平假名/片假名、CJK 扩展 A、CJK 统一汉字、兼容汉字、谚文音节
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+_CJK_RUN = re.compile(f'[{_CJK}]+')
+
+# 生成摘要时去掉的 Markdown 标记
+_MD_NOISE = re.compile(r'```[^\n]*|`|^#{1,6}\s*|^\s*>\s?|[*_~]{1,3}|!?\[([^\]]*)\]\([^)]*\)', re.M)
+
+
+def _bigrams(run: str) -> str:
+    if len(run) == 1:
+        return run
+    return ' '.join(run[i:i + 2] for i in range(len(run) - 1))
+
+
+def segment(text: str) -> str:
+    """将文本中的连续中日韩文字切分为空格分隔的二元组（bigram），其余文本保持不变
+
+    SQLite 的 unicode61 分词器会把一整段中文当成一个词，无法检索其中的片段；
+    写入索引与构造查询前都先经过本函数，例如 "中文搜索" -> "中文 文搜 搜索"。
+    """
+    return _CJK_RUN.sub(lambda m: f' {_bigrams(m.group())} ', text or '')
+
+
+def build_match_query(q: str) -> str | None:
+    """将用户输入转换为 FTS5 MATCH 表达式，多个关键词之间为 AND 关系
+
+    每个关键词切分后作为一个短语（连续的 bigram 即原文中的连续片段）；
+    单个汉字没有 bigram，改用前缀查询匹配以该字开头的 bigram。
+    """
+    phrases = []
+    for term in (q or '').split():
+        seg = segment(term).split()
+        # 去掉只含标点的片段（分词器会忽略它们，留下空短语会导致语法错误）
+        seg = [s for s in seg if re.search(r'\w', s)]
+        if not seg:
+            continue
+        phrase = '"' + ' '.join(seg).replace('"', '""') + '"'
+        if len(seg) == 1 and len(seg[0]) == 1 and _CJK_RUN.fullmatch(seg[0]):
+            phrase += ' *'
+        phrases.append(phrase)
+    return ' '.join(phrases) or None
+
+
+def highlight(text: str, q: str) -> Markup:
+    """转义文本并用 <mark> 标出关键词（忽略大小写）"""
+    terms = sorted({t for t in (q or '').split() if t}, key=len, reverse=True)
+    if not terms:
+        return escape(text or '')
+    pattern = re.compile('|'.join(re.escape(t) for t in terms), re.I)
+    out, pos = [], 0
+    for m in pattern.finditer(text or ''):
+        out.append(escape(text[pos:m.start()]))
+        out.append(Markup('<mark>') + escape(m.group()) + Markup('</mark>'))
+        pos = m.end()
+    out.append(escape((text or '')[pos:]))
+    return Markup('').join(out)
+
+
+def make_snippet(content: str, q: str, width: int = 80) -> Markup:
+    """从 Markdown 正文中截取包含首个关键词的片段并高亮"""
+    plain = _MD_NOISE.sub(lambda m: m.group(1) or '', content or '')
+    plain = re.sub(r'\s+', ' ', plain).strip()
+
+    first = None
+    for t in (q or '').split():
+        i = plain.lower().find(t.lower())
+        if i >= 0 and (first is None or i < first):
+            first = i
+    start = max(0, (first or 0) - width // 3)
+    end = min(len(plain), start + width)
+
+    snippet = highlight(plain[start:end], q)
+    if start > 0:
+        snippet = Markup('…') + snippet
+    if end < len(plain):
+        snippet = snippet + Markup('…')
+    return snippet
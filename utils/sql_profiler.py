@@ -0,0 +1,196 @@
+"""SQL 剖析：按请求统计每条语句的执行次数与耗时，标记 N+1 嫌疑，记录慢查询
+
+- 慢查询日志：任一语句耗时超过 SQL_SLOW_QUERY_MS 时写入警告日志，附带发起它的路由（生产环境同样生效）
+- 请求剖析（SQL_PROFILER_ENABLED，开发环境默认开启）：
+  - 同一请求中相同语句（参数不同）执行次数达到 SQL_PROFILER_REPEAT_THRESHOLD 时记为 N+1 嫌疑并写入日志
+  - 响应附带 Server-Timing 头（db / app 耗时），浏览器开发者工具的 Timing 面板可直接查看
+  - SQL_PROFILER_HTML 开启或请求带 ?_sql=1 时，在 HTML 页面末尾附加语句汇总表
+- 命令行脚本可使用 profile_queries() 统计一段代码的查询（见 seed.py --profile-sql）
+
+需在 compress.init_app 之后初始化：after_request 按注册的逆序执行，汇总表要在压缩之前插入页面。
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import request, g, has_request_context
+from markupsafe import escape
+
+from . import query_events
+
+# 日志与汇总表中语句的最大长度
+STATEMENT_PREVIEW = 500
+
+_current = ContextVar('sql_profile', default=None)
+
+
+class QueryProfile:
+    """一个请求（或一段代码）内执行的语句统计"""
+
+    def __init__(self, label: str = ''):
+        self.label = label
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        # 语句文本 -> [执行次数, 总耗时]；语句中的参数是占位符，参数不同的同一查询归为一项
+        self.statements = {}
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.seconds += elapsed
+        stat = self.statements.get(statement)
+        if stat is None:
+            self.statements[statement] = [1, elapsed]
+        else:
+            stat[0] += 1
+            stat[1] += elapsed
+
+    def repeated(self, threshold: int) -> list[tuple[str, int, float]]:
+        """执行次数达到阈值的语句（N+1 嫌疑），按次数降序"""
+        if threshold <= 0:
+            return []
+        return sorted(
+            ((s, n, t) for s, (n, t) in self.statements.items() if n >= threshold),
+            key=lambda x: -x[1],
+        )
+
+    def top(self, limit: int = 20) -> list[tuple[str, int, float]]:
+        """按总耗时降序的语句"""
+        return sorted(
+            ((s, n, t) for s, (n, t) in self.statements.items()),
+            key=lambda x: -x[2],
+        )[:limit]
+
+    def report(self, repeat_threshold: int = 5, limit: int = 20) -> str:
+        """纯文本汇总（命令行使用）"""
+        lines = [f'SQL: {self.count} 条，{self.seconds * 1e3:.1f}ms（{self.label or "-"}）']
+        repeated = {s for s, _, _ in self.repeated(repeat_threshold)}
+        for statement, n, t in self.top(limit):
+            mark = ' [N+1?]' if statement in repeated else ''
+            lines.append(f'  {n:>5}x {t * 1e3:>9.1f}ms{mark}  {_preview(statement, 160)}')
+        return '\n'.join(lines)
+
+
+@contextmanager
+def profile_queries(label: str = ''):
+    """统计代码块内（当前线程）执行的 SQL，返回 QueryProfile
+
+    用法：
+        with profile_queries('import') as prof:
+            ...
+        print(prof.report())
+    """
+    prof = QueryProfile(label)
+    token = _current.set(prof)
+    try:
+        yield prof
+    finally:
+        _current.reset(token)
+
+
+def _preview(statement: str, limit: int = STATEMENT_PREVIEW) -> str:
+    text = ' '.join(statement.split())
+    return text if len(text) <= limit else text[:limit] + '…'
+
+
+def _route() -> str:
+    if not has_request_context():
+        return '-'
+    return f'{request.method} {request.path} ({request.endpoint or "<unmatched>"})'
+
+
+class SQLProfiler:
+    """SQL 慢查询日志与请求剖析（Server-Timing、N+1 嫌疑、HTML 汇总表）"""
+
+    def __init__(self, app=None, db=None):
+        self._app = None
+        self._slow_seconds = 0.0
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault('SQL_SLOW_QUERY_MS', 200)
+        app.config.setdefault('SQL_PROFILER_ENABLED', False)
+        app.config.setdefault('SQL_PROFILER_REPEAT_THRESHOLD', 5)
+        app.config.setdefault('SQL_PROFILER_HTML', False)
+        app.extensions['sql_profiler'] = self
+        self._app = app
+
+        # 计时始终开启（profile_queries() 依赖它），与运行指标共用 utils/query_events.py 的监听
+        self._slow_seconds = max(0.0, float(app.config['SQL_SLOW_QUERY_MS'] or 0)) / 1e3
+        with app.app_context():
+            for engine in db.engines.values():
+                query_events.install(engine)
+        query_events.subscribe(self._on_query)
+
+        if app.config['SQL_PROFILER_ENABLED']:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+            app.teardown_request(self._teardown_request)
+
+    def _on_query(self, statement: str, elapsed: float, executemany: bool):
+        prof = _current.get()
+        if prof is not None:
+            prof.record(statement, elapsed)
+        if self._slow_seconds and elapsed >= self._slow_seconds:
+            # 只记录语句文本，不记录参数（可能包含密码哈希等敏感数据）
+            self._app.logger.warning('慢查询 %.1fms [%s] %s%s', elapsed * 1e3, _route(),
+                                     _preview(statement), '（executemany）' if executemany else '')
+
+    # ---------------
+    # 请求钩子
+    # ---------------
+
+    def _before_request(self):
+        prof = QueryProfile(request.endpoint or '<unmatched>')
+        g._sql_profile = prof
+        g._sql_profile_token = _current.set(prof)
+
+    def _after_request(self, resp):
+        prof = g.get('_sql_profile')
+        if prof is None:
+            return resp
+        config = self._app.config
+        threshold = int(config['SQL_PROFILER_REPEAT_THRESHOLD'])
+        repeated = prof.repeated(threshold)
+        for statement, n, t in repeated:
+            self._app.logger.warning('N+1 嫌疑：[%s] 同一语句执行 %d 次，共 %.1fms：%s',
+                                     _route(), n, t * 1e3, _preview(statement))
+
+        total_ms = (time.perf_counter() - prof.started) * 1e3
+        resp.headers.add('Server-Timing', f'db;dur={prof.seconds * 1e3:.1f};desc="{prof.count} queries"')
+        resp.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+
+        show_html = config['SQL_PROFILER_HTML'] or request.args.get('_sql') == '1'
+        if (show_html and resp.mimetype == 'text/html' and not resp.direct_passthrough
+                and not resp.is_streamed and 'Content-Encoding' not in resp.headers):
+            body = resp.get_data(as_text=True)
+            summary = _html_summary(prof, {s for s, _, _ in repeated}, total_ms)
+            pos = body.rfind('</body>')
+            resp.set_data(body[:pos] + summary + body[pos:] if pos >= 0 else body + summary)
+        return resp
+
+    def _teardown_request(self, exc=None):
+        token = g.pop('_sql_profile_token', None)
+        if token is not None:
+            _current.reset(token)
+
+
+def _html_summary(prof: QueryProfile, repeated: set, total_ms: float) -> str:
+    rows = []
+    for statement, n, t in prof.top():
+        flag = ' style="background:#fff3cd"' if statement in repeated else ''
+        rows.append(
+            f'<tr{flag}><td style="text-align:right">{n}</td>'
+            f'<td style="text-align:right">{t * 1e3:.1f}</td>'
+            f'<td><code>{escape(_preview(statement))}</code></td></tr>'
+        )
+    return (
+        '<details class="sql-profile" style="margin:1rem;font:12px/1.4 monospace">'
+        f'<summary>SQL {prof.count} 条 · {prof.seconds * 1e3:.1f}ms / 请求 {total_ms:.1f}ms'
+        f'{" · N+1 嫌疑 " + str(len(repeated)) + " 项" if repeated else ""}</summary>'
+        '<table style="border-collapse:collapse;width:100%">'
+        '<tr><th>次数</th><th>ms</th><th>语句</th></tr>'
+        + ''.join(rows) +
+        '</table></details>'
+    )